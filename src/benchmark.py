@@ -0,0 +1,794 @@
+import argparse
+import html
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from build import build_site, find_templates, scan_pages
+from convert import (
+        block_to_block_type,
+        iter_markdown_blocks,
+        extract_markdown_links,
+        split_nodes_link,
+        code_to_html_node,
+        markdown_to_blocks,
+        markdown_to_html,
+        markdown_to_html_node,
+        text_to_children,
+        text_to_textnodes,
+        text_node_to_html_node,
+        text_nodes_to_html_nodes
+    )
+from corpus import CORPUS_KINDS, generate_corpus, generate_page
+from document import Document
+from flattree import FlatTree
+from htmlnode import escape_attribute, escape_text
+from leafnode import LeafNode
+from parentnode import ParentNode
+from textnode import TextNode, TextType
+from watch import ContentScanner
+
+def measure(func, repeat = 5):
+    # best of several runs, in seconds
+    best = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+def report(name, results):
+    columns = "  ".join(f"{label} {seconds * 1000:9.2f} ms" for label, seconds in results)
+    print(f"{name:<40} {columns}")
+
+def recursive_to_html(node):
+    # reference renderer, recurses once per level of nesting
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+
+    parts = [ node.start_tag() ]
+
+    for child in node.children:
+        parts.append(recursive_to_html(child))
+
+    parts.append(f"</{node.tag}>")
+
+    return "".join(parts)
+
+def wide_tree(width):
+    children = []
+
+    for i in range(width):
+        item = ParentNode("li", [ LeafNode("b", "bold"), LeafNode(None, f" item {i}") ])
+        children.append(item)
+
+    return ParentNode("div", [ ParentNode("ul", children) ])
+
+def deep_tree(depth):
+    node = ParentNode("p", [ LeafNode(None, "text") ])
+
+    for _ in range(depth):
+        node = ParentNode("blockquote", [ LeafNode("i", "quote"), node ])
+
+    return node
+
+def bench_render():
+    for width in (1000, 100000):
+        tree = wide_tree(width)
+
+        report(f"render wide ({width} items)", [
+            ("recursive", measure(lambda: recursive_to_html(tree))),
+            ("iterative", measure(tree.to_html)),
+        ])
+
+    # stay below the default recursion limit for the recursive renderer
+    for depth in (100, 900):
+        tree = deep_tree(depth)
+
+        report(f"render deep ({depth} levels)", [
+            ("recursive", measure(lambda: recursive_to_html(tree))),
+            ("iterative", measure(tree.to_html)),
+        ])
+
+    tree = deep_tree(100000)
+
+    report("render deep (100000 levels)", [
+        ("iterative", measure(tree.to_html)),
+    ])
+
+def measure_memory(func):
+    # bytes still allocated after func returns, func's result is kept alive
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del result
+
+    return after - before
+
+# node layout before __slots__, kept as a reference for bench_memory
+class DictTextNode():
+    def __init__(self, text, text_type, url = None, children = None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+        self.children = children
+
+class DictHTMLNode():
+    def __init__(self, tag = None, value = None, children = None, props = None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+def make_text_nodes(cls, count):
+    # the strings are shared, only node storage is measured
+    return [ cls("text", TextType.NORMAL) for _ in range(count) ]
+
+def make_leaf_nodes(cls, count):
+    nodes = []
+
+    for i in range(count):
+        if i % 4 == 0:
+            nodes.append(cls("a", "link", { "href": "example.com" }))
+        else:
+            nodes.append(cls("b", "bold"))
+
+    return nodes
+
+def make_dict_leaf(tag, value, props = None):
+    return DictHTMLNode(tag, value, None, props)
+
+def make_parent_nodes(cls, count):
+    return [ cls("p", []) for _ in range(count) ]
+
+def make_dict_parent(tag, children, props = None):
+    return DictHTMLNode(tag, None, children, props)
+
+def copy_text_nodes(text_nodes):
+    # the same nodes with their text as strings, as before spans
+    copies = []
+
+    for node in text_nodes:
+        children = None
+
+        if node.children is not None:
+            children = copy_text_nodes(node.children)
+
+        copies.append(TextNode(node.text, node.text_type, node.url, children))
+
+    return copies
+
+def bench_memory():
+    count = 10000
+
+    cases = [
+        ("TextNode", lambda: make_text_nodes(DictTextNode, count),
+                     lambda: make_text_nodes(TextNode, count)),
+        ("LeafNode", lambda: make_leaf_nodes(make_dict_leaf, count),
+                     lambda: make_leaf_nodes(LeafNode, count)),
+        ("ParentNode", lambda: make_parent_nodes(make_dict_parent, count),
+                       lambda: make_parent_nodes(ParentNode, count)),
+    ]
+
+    for name, before, after in cases:
+        before_bytes = measure_memory(before)
+        after_bytes = measure_memory(after)
+
+        print(f"{f'memory {name} ({count} nodes)':<40} "
+              f"__dict__ {before_bytes / 1024:9.1f} KiB  "
+              f"__slots__ {after_bytes / 1024:9.1f} KiB")
+
+    # text nodes of every paragraph kept alive, the paragraphs themselves
+    # are not counted
+    for kind in CORPUS_KINDS:
+        paragraphs = [ block.replace("\n", " ")
+                       for block in iter_markdown_blocks(generate_page(kind, 1000).split("\n"))
+                       if block_to_block_type(block) == "paragraph" ]
+
+        strings_bytes = measure_memory(lambda: [ copy_text_nodes(text_to_textnodes(paragraph))
+                                                 for paragraph in paragraphs ])
+        spans_bytes = measure_memory(lambda: [ text_to_textnodes(paragraph) for paragraph in paragraphs ])
+
+        print(f"{f'memory text nodes ({kind})':<40} "
+              f"strings {strings_bytes / 1024:9.1f} KiB  "
+              f"spans {spans_bytes / 1024:9.1f} KiB")
+
+def write_site(root, pages):
+    content_dir = os.path.join(root, "content")
+    template_path = os.path.join(root, "template.html")
+
+    with open(template_path, "w", encoding="utf-8") as f:
+        f.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>")
+
+    for i in range(pages):
+        directory = os.path.join(content_dir, f"section{i % 20}")
+        os.makedirs(directory, exist_ok=True)
+
+        kind = CORPUS_KINDS[i % len(CORPUS_KINDS)]
+
+        with open(os.path.join(directory, f"page{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Page {i}\n\n{generate_page(kind, 20, i)}\n")
+
+    return content_dir, template_path
+
+def bench_flat_tree():
+    for kind in CORPUS_KINDS:
+        text = generate_page(kind, 1000)
+        tree = markdown_to_html_node(text)
+        flat = FlatTree(tree)
+        nodes = len(flat)
+
+        if flat.to_html() != tree.to_html():
+            raise Exception("FlatTree mismatch")
+
+        # the source is shared, only the trees are measured
+        objects_bytes = measure_memory(lambda: markdown_to_html_node(text))
+        flat_bytes = measure_memory(lambda: FlatTree(markdown_to_html_node(text)))
+
+        print(f"{f'memory tree ({kind}, {nodes} nodes)':<40} "
+              f"objects {objects_bytes / nodes:7.1f} B/node  "
+              f"flat {flat_bytes / nodes:7.1f} B/node")
+
+        report(f"render tree ({kind}, {nodes} nodes)", [
+            ("objects", measure(tree.to_html)),
+            ("flat", measure(flat.to_html)),
+        ])
+
+def write_content_tree(root, pages, per_directory = 100):
+    # only the layout matters, pages are tiny
+    for i in range(pages):
+        directory = os.path.join(root, f"section{i // (per_directory * 10)}", f"dir{i // per_directory}")
+
+        if i % per_directory == 0:
+            os.makedirs(directory)
+
+        with open(os.path.join(directory, f"page{i}.md"), "w") as f:
+            f.write(f"# Page {i}")
+
+    # older than the scanner's racy window
+    for path, dirs, files in os.walk(root):
+        os.utime(path, ns=(0, 1000000000))
+
+def bench_watch():
+    pages = 20000
+
+    with tempfile.TemporaryDirectory() as root:
+        write_content_tree(root, pages)
+
+        polling = ContentScanner(root, False)
+        notify = ContentScanner(root, True)
+        edited = os.path.join(root, "section0", "dir0", "page0.md")
+
+        def edit():
+            with open(edited, "a") as f:
+                f.write(" ")
+
+            notify.update()
+
+        results = [
+            ("two walks", measure(lambda: (scan_pages(root), find_templates(root)))),
+            ("polling", measure(polling.update)),
+        ]
+
+        if notify.notifier is not None:
+            results.append(("inotify", measure(notify.update)))
+            results.append(("inotify edit", measure(edit)))
+
+        report(f"serve poll ({pages} pages)", results)
+
+        notify.close()
+
+def bench_parallel():
+    pages = 2000
+    cpus = os.cpu_count() or 1
+
+    jobs = [ 1 ]
+
+    while jobs[-1] * 2 <= cpus:
+        jobs.append(jobs[-1] * 2)
+
+    if jobs[-1] != cpus:
+        jobs.append(cpus)
+
+    with tempfile.TemporaryDirectory() as root:
+        content_dir, template_path = write_site(root, pages)
+        dest_dir = os.path.join(root, "public")
+        manifest_path = os.path.join(root, "manifest.json")
+
+        baseline = None
+
+        for count in jobs:
+            def run():
+                # full build every time
+                if os.path.exists(manifest_path):
+                    os.remove(manifest_path)
+
+                build_site(content_dir, template_path, dest_dir, manifest_path, "bench", count)
+
+            seconds = measure(run, 3)
+
+            if baseline is None:
+                baseline = seconds
+
+            print(f"{f'build {pages} pages, {count} jobs':<40} "
+                  f"{seconds * 1000:9.2f} ms  speedup {baseline / seconds:5.2f}x")
+
+def reference_block_to_block_type(block_text):
+    # classifier before precompiled patterns, kept as a reference
+    if re.match(r'^[#]{1,6} .*', block_text):
+        return "heading"
+
+    if block_text.startswith("```") and block_text.endswith("```"):
+        return "code"
+
+    lines = block_text.split("\n")
+    quote_count = 0
+    unordered_list_count = 0
+    ordered_list_count = 1
+
+    for line in lines:
+        if line.startswith(">"):
+            quote_count += 1
+
+        if re.match(r'^[*-] .*', line):
+            unordered_list_count +=1
+
+        if line.startswith(f"{ordered_list_count}. "):
+            ordered_list_count += 1
+
+    if len(lines) == quote_count:
+        return "quote"
+
+    if len(lines) == unordered_list_count:
+        return "unordered_list"
+
+    if len(lines) == ordered_list_count - 1:
+        return "ordered_list"
+
+    return "paragraph"
+
+def mixed_blocks():
+    items = "\n".join(f"* list item {i} with some text" for i in range(20))
+    numbered = "\n".join(f"{i + 1}. numbered item {i}" for i in range(20))
+    quote = "\n".join(f"> quoted line {i}" for i in range(5))
+    paragraph = "\n".join(f"paragraph line {i} with **bold** text" for i in range(5))
+    code = "```\n" + "\n".join(f"line = {i}" for i in range(10)) + "\n```"
+
+    return [ "# heading", "### sub heading", items, numbered, quote, paragraph, code,
+             "* almost a list\nbut not quite", "1. almost\n3. ordered" ] * 100
+
+def bench_classify():
+    blocks = mixed_blocks()
+
+    for block in blocks:
+        if block_to_block_type(block) != reference_block_to_block_type(block):
+            raise Exception(f"block type mismatch: {block!r}")
+
+    def run(classify):
+        for block in blocks:
+            classify(block)
+
+    report(f"classify ({len(blocks)} mixed blocks)", [
+        ("reference", measure(lambda: run(reference_block_to_block_type))),
+        ("precompiled", measure(lambda: run(block_to_block_type))),
+    ])
+
+def reference_split_nodes_link(old_nodes):
+    # findall and split per link, kept as a reference; quadratic in the
+    # number of links
+    new_nodes = []
+
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.NORMAL:
+            new_nodes.append(old_node)
+            continue
+
+        links = extract_markdown_links(old_node.text)
+
+        if len(links) == 0:
+            new_nodes.append(old_node)
+            continue
+
+        original_text = old_node.text
+
+        for link in links:
+            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
+
+            if sections[0] != "":
+                new_nodes.append(TextNode(sections[0], TextType.NORMAL))
+
+            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
+
+            original_text = sections[1]
+
+        if original_text != "":
+            new_nodes.append(TextNode(original_text, TextType.NORMAL))
+
+    return new_nodes
+
+def bench_links():
+    for count in (1000, 10000):
+        text = " ".join(f"see [page {i}](https://example.com/{i}) and" for i in range(count))
+        nodes = [ TextNode(text, TextType.NORMAL) ]
+
+        if split_nodes_link(nodes) != reference_split_nodes_link(nodes):
+            raise Exception("split_nodes_link mismatch")
+
+        report(f"split links ({count} links)", [
+            ("split", measure(lambda: reference_split_nodes_link(nodes), 3)),
+            ("finditer", measure(lambda: split_nodes_link(nodes), 3)),
+        ])
+
+def reference_code_to_html_node(block):
+    # code blocks before the literal fast path, parsed as inline markdown
+    content = block.replace("```", "")
+
+    return ParentNode("pre", [ ParentNode("code", text_to_children(content)) ])
+
+def bench_code():
+    for blocks in (100, 1000):
+        text = generate_page("code", blocks)
+        code_blocks = [ block for block in markdown_to_blocks(text) if block_to_block_type(block) == "code" ]
+
+        report(f"code blocks ({len(code_blocks)} blocks)", [
+            ("inline", measure(lambda: [ reference_code_to_html_node(block).to_html() for block in code_blocks ])),
+            ("literal", measure(lambda: [ code_to_html_node(block).to_html() for block in code_blocks ])),
+        ])
+
+def bench_fused():
+    for kind in CORPUS_KINDS:
+        text = generate_page(kind, 1000)
+
+        if markdown_to_html(text) != markdown_to_html_node(text).to_html():
+            raise Exception("markdown_to_html mismatch")
+
+        report(f"markdown to html ({kind}, 1000 blocks)", [
+            ("nodes", measure(lambda: markdown_to_html_node(text).to_html())),
+            ("fused", measure(lambda: markdown_to_html(text))),
+        ])
+
+def reference_props_to_html(node):
+    # props_to_html before escaping and caching, rebuilt on every call
+    result = ""
+
+    for attr, value in node._props.items():
+        result += f" {attr}=\"{value}\""
+
+    return result
+
+ESCAPE_TABLE = str.maketrans({ "&": "&amp;", "<": "&lt;", ">": "&gt;", "\"": "&quot;", "'": "&#x27;" })
+
+def translate_escape(value):
+    return value.translate(ESCAPE_TABLE)
+
+def attribute_nodes(node):
+    nodes = []
+    pending = [ node ]
+
+    while len(pending) > 0:
+        node = pending.pop()
+
+        if node.children is not None:
+            pending.extend(node.children)
+        elif node.tag in ("a", "img"):
+            nodes.append(node)
+
+    return nodes
+
+def bench_escape():
+    pages = {
+        "links": generate_page("links", 200),
+        "images": "\n\n".join(" ".join(f"![image {i} of {j}](/images/{j}/{i}.png)" for i in range(50))
+                               for j in range(200)),
+    }
+
+    for name, text in pages.items():
+        nodes = attribute_nodes(markdown_to_html_node(text))
+        values = [ value for node in nodes for value in node.props.values() ]
+
+        report(f"props_to_html ({name}, {len(nodes)} nodes)", [
+            ("unescaped +=", measure(lambda: [ reference_props_to_html(node) for node in nodes ])),
+            ("cached", measure(lambda: [ node.props_to_html() for node in nodes ])),
+        ])
+
+        report(f"escape attributes ({name}, {len(values)} values)", [
+            ("translate", measure(lambda: [ translate_escape(value) for value in values ])),
+            ("html.escape", measure(lambda: [ html.escape(value) for value in values ])),
+            ("replace", measure(lambda: [ escape_attribute(value) for value in values ])),
+        ])
+
+        report(f"escape text ({name}, {len(text)} chars)", [
+            ("translate", measure(lambda: translate_escape(text))),
+            ("html.escape", measure(lambda: html.escape(text, quote=False))),
+            ("replace", measure(lambda: escape_text(text))),
+        ])
+
+def reference_text_node_to_html_node(text_node):
+    # text_node_to_html_node before the converter table, a match statement
+    # and LeafNode construction per node
+    if text_node.children is not None:
+        children = [ reference_text_node_to_html_node(child) for child in text_node.children ]
+
+        return ParentNode("b" if text_node.text_type == TextType.BOLD else "i", children)
+
+    match text_node.text_type:
+        case TextType.NORMAL:
+            return LeafNode(None, escape_text(text_node.text))
+        case TextType.BOLD:
+            return LeafNode("b", escape_text(text_node.text))
+        case TextType.ITALIC:
+            return LeafNode("i", escape_text(text_node.text))
+        case TextType.CODE:
+            return LeafNode("code", escape_text(text_node.text))
+        case TextType.LINK:
+            return LeafNode("a", escape_text(text_node.text), { "href": text_node.url })
+        case TextType.IMAGE:
+            return LeafNode("img", "", { "src": text_node.url, "alt": text_node.text })
+
+def corpus_text_nodes(kind, blocks):
+    text_nodes = []
+
+    for block in markdown_to_blocks(generate_page(kind, blocks)):
+        for inline_text in inline_texts(block, block_to_block_type(block)):
+            text_nodes.extend(text_to_textnodes(inline_text))
+
+    return text_nodes
+
+def bench_text_nodes():
+    for kind in CORPUS_KINDS:
+        text_nodes = corpus_text_nodes(kind, 1000)
+
+        if len(text_nodes) == 0:
+            continue
+
+        expected = [ node.to_html() for node in map(reference_text_node_to_html_node, text_nodes) ]
+
+        if [ node.to_html() for node in text_nodes_to_html_nodes(text_nodes) ] != expected:
+            raise Exception("text_nodes_to_html_nodes mismatch")
+
+        report(f"text nodes to html nodes ({kind}, {len(text_nodes)} nodes)", [
+            ("match", measure(lambda: [ reference_text_node_to_html_node(node) for node in text_nodes ])),
+            ("table", measure(lambda: [ text_node_to_html_node(node) for node in text_nodes ])),
+            ("batch", measure(lambda: text_nodes_to_html_nodes(text_nodes))),
+        ])
+
+def bench_reparse():
+    for kind in ("paragraphs", "links"):
+        text = generate_page(kind, 5000)
+        blocks = markdown_to_blocks(text)
+        middle = len(blocks) // 2
+
+        # the same edit applied and undone, so every update changes one block
+        edited = "\n\n".join(blocks[:middle] + [ "an edited paragraph" ] + blocks[middle + 1:])
+        document = Document(text)
+        texts = [ edited, text ]
+
+        def full():
+            markdown_to_html_node(texts[0]).to_html()
+            texts.reverse()
+
+        def incremental():
+            document.update(texts[0])
+            document.to_html()
+            texts.reverse()
+
+        if Document(edited).to_html() != markdown_to_html_node(edited).to_html():
+            raise Exception("Document mismatch")
+
+        report(f"edit one block ({kind}, 5000 blocks)", [
+            ("full", measure(full, 4)),
+            ("incremental", measure(incremental, 4)),
+        ])
+
+BENCHMARKS = {
+    "render": bench_render,
+    "memory": bench_memory,
+    "flat_tree": bench_flat_tree,
+    "parallel": bench_parallel,
+    "watch": bench_watch,
+    "classify": bench_classify,
+    "links": bench_links,
+    "reparse": bench_reparse,
+    "code": bench_code,
+    "fused": bench_fused,
+    "escape": bench_escape,
+    "text_nodes": bench_text_nodes,
+}
+
+# pipeline stages timed by the suite, in pipeline order
+STAGES = (
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "text_node_to_html_node",
+    "to_html",
+    "total",
+)
+
+def inline_texts(block, block_type):
+    # the text each block converter passes to text_to_children
+    lines = block.split("\n")
+
+    match block_type:
+        case "heading":
+            return [ block[block.index(" ") + 1:] ]
+        case "code":
+            # code blocks are literal text
+            return []
+        case "quote":
+            return [ "\n".join(line[1:].strip() for line in lines) ]
+        case "unordered_list":
+            return [ line[2:] for line in lines ]
+        case "ordered_list":
+            return [ line[line.index(". ") + 2:] for line in lines ]
+        case _:
+            return [ " ".join(lines) ]
+
+def time_stages(text, repeat):
+    blocks = markdown_to_blocks(text)
+    block_types = [ block_to_block_type(block) for block in blocks ]
+
+    texts = []
+
+    for block, block_type in zip(blocks, block_types):
+        texts.extend(inline_texts(block, block_type))
+
+    text_nodes = []
+
+    for inline_text in texts:
+        text_nodes.extend(text_to_textnodes(inline_text))
+
+    tree = markdown_to_html_node(text)
+
+    return {
+        "markdown_to_blocks": measure(lambda: markdown_to_blocks(text), repeat),
+        "block_to_block_type": measure(lambda: [ block_to_block_type(block) for block in blocks ], repeat),
+        "text_to_textnodes": measure(lambda: [ text_to_textnodes(inline_text) for inline_text in texts ], repeat),
+        "text_node_to_html_node": measure(lambda: text_nodes_to_html_nodes(text_nodes), repeat),
+        "to_html": measure(tree.to_html, repeat),
+        "total": measure(lambda: markdown_to_html_node(text).to_html(), repeat),
+    }
+
+def run_suite(seed = 0, repeat = 5, kinds = CORPUS_KINDS):
+    corpus = generate_corpus(seed, kinds)
+    results = {}
+
+    for name, text in corpus.items():
+        results[name] = time_stages(text, repeat)
+        results[name]["bytes"] = len(text.encode("utf-8"))
+
+    return {
+        "python": platform.python_version(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+def compare_results(baseline, current, threshold):
+    # (name, stage, baseline seconds, current seconds, regressed) for
+    # every timing present in both runs
+    rows = []
+
+    for name in baseline["results"]:
+        if name not in current["results"]:
+            continue
+
+        for stage in STAGES:
+            before = baseline["results"][name].get(stage)
+            after = current["results"][name].get(stage)
+
+            if before is None or after is None:
+                continue
+
+            rows.append((name, stage, before, after, after > before * (1 + threshold)))
+
+    return rows
+
+def print_suite(suite):
+    for name, stages in suite["results"].items():
+        columns = "  ".join(f"{stage} {stages[stage] * 1000:.2f} ms" for stage in STAGES)
+        print(f"{name:<20} {columns}")
+
+def run(args):
+    for name in args.names:
+        if name not in BENCHMARKS:
+            print(f"unknown benchmark: {name}", file=sys.stderr)
+            return 2
+
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
+
+    return 0
+
+def suite(args):
+    kinds = args.kinds or CORPUS_KINDS
+
+    for kind in kinds:
+        if kind not in CORPUS_KINDS:
+            print(f"unknown corpus kind: {kind}", file=sys.stderr)
+            return 2
+
+    result = run_suite(args.seed, args.repeat, kinds)
+
+    print_suite(result)
+
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    return 0
+
+def compare(args):
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    with open(args.current, "r", encoding="utf-8") as f:
+        current = json.load(f)
+
+    if baseline.get("seed") != current.get("seed"):
+        print("warning: results were generated with different seeds", file=sys.stderr)
+
+    regressions = 0
+
+    for name, stage, before, after, regressed in compare_results(baseline, current, args.threshold):
+        change = (after - before) / before * 100 if before > 0 else 0.0
+        flag = "  REGRESSION" if regressed else ""
+
+        print(f"{name:<20} {stage:<24} {before * 1000:9.2f} ms -> {after * 1000:9.2f} ms {change:+7.1f}%{flag}")
+
+        if regressed:
+            regressions += 1
+
+    if regressions > 0:
+        print(f"{regressions} regressions above {args.threshold * 100:.0f}%")
+        return 1
+
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run static site generator benchmarks.")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="run single benchmarks (default)")
+    run_parser.add_argument("names", nargs="*",
+                            help=f"benchmarks to run, all by default ({', '.join(BENCHMARKS)})")
+    run_parser.set_defaults(func=run)
+
+    suite_parser = commands.add_parser("suite", help="time each conversion stage on a synthetic corpus")
+    suite_parser.add_argument("kinds", nargs="*",
+                              help=f"corpus kinds, all by default ({', '.join(CORPUS_KINDS)})")
+    suite_parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    suite_parser.add_argument("--repeat", type=int, default=5, help="runs per timing, the best is kept")
+    suite_parser.add_argument("--output", "-o", help="write results as json")
+    suite_parser.set_defaults(func=suite)
+
+    compare_parser = commands.add_parser("compare", help="compare suite results against a baseline")
+    compare_parser.add_argument("baseline", help="json results of the baseline run")
+    compare_parser.add_argument("current", help="json results to check")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="slowdown reported as a regression, 0.1 is 10%%")
+    compare_parser.set_defaults(func=compare)
+
+    argv = sys.argv[1:]
+
+    if len(argv) == 0 or argv[0] not in ("run", "suite", "compare", "-h", "--help"):
+        argv = [ "run", *argv ]
+
+    args = parser.parse_args(argv)
+
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,574 @@
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from convert import BlockCache, markdown_to_html
+from htmlnode import escape_text
+import profiling
+from rendercache import RENDER_CACHE_SIZE, RenderCache
+from template import Template
+
+# modules whose code affects the generated pages
+CONVERTER_MODULES = (
+    "build.py",
+    "convert.py",
+    "htmlnode.py",
+    "leafnode.py",
+    "parentnode.py",
+    "template.py",
+    "textnode.py",
+)
+
+MANIFEST_VERSION = 2
+
+# converted blocks kept per worker, shared blocks such as footers are
+# converted once per batch
+BLOCK_CACHE_SIZE = 1024
+
+# a file with this name in a content directory is the template of the
+# pages below it, instead of the default template
+TEMPLATE_NAME = "template.html"
+
+# amount of markdown below which pages are grouped into one batch, unless
+# that leaves workers idle
+BATCH_BYTES = 16 * 1024
+
+class BuildResult():
+    def __init__(self):
+        self.built = []
+        self.skipped = []
+        self.removed = []
+
+    def __repr__(self):
+        return f"BuildResult({len(self.built)} built, {len(self.skipped)} skipped, {len(self.removed)} removed)"
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hash_bytes(f.read())
+
+def converter_version():
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    for name in CONVERTER_MODULES:
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+
+    return digest.hexdigest()
+
+def walk_pages(content_dir, suffixes = ".md"):
+    # (page, os.DirEntry) for every markdown file, page is the relative
+    # "/" separated path
+    pending = [ "" ]
+
+    while len(pending) > 0:
+        prefix = pending.pop()
+
+        with os.scandir(os.path.join(content_dir, prefix)) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append(prefix + entry.name + "/")
+                elif entry.name.endswith(suffixes):
+                    yield prefix + entry.name, entry
+
+def find_pages(content_dir):
+    pages = []
+
+    for page, entry in walk_pages(content_dir):
+        pages.append(page)
+
+    pages.sort()
+
+    return pages
+
+def scan_pages(content_dir):
+    # page to [ mtime_ns, size ], the same key as stat_key
+    stats = {}
+
+    for page, entry in walk_pages(content_dir):
+        stat = entry.stat()
+        stats[page] = [ stat.st_mtime_ns, stat.st_size ]
+
+    return stats
+
+def parse_shard(text):
+    # "i/N" to (i, N), shards are numbered from 1
+    index, slash, count = text.partition("/")
+
+    if slash == "" or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"invalid shard: {text}")
+
+    index = int(index)
+    count = int(count)
+
+    if count < 1 or index < 1 or index > count:
+        raise ValueError(f"invalid shard: {text}")
+
+    return index, count
+
+def page_shard(page, count):
+    # the shard a page belongs to, stable across machines and python
+    # versions, unlike hash()
+    digest = hashlib.sha256(page.encode("utf-8")).digest()
+
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def find_templates(content_dir):
+    # content directory, "" for the top, to the path of its template
+    overrides = {}
+
+    for path, entry in walk_pages(content_dir, TEMPLATE_NAME):
+        if entry.name == TEMPLATE_NAME:
+            overrides[posixpath.dirname(path)] = entry.path
+
+    return overrides
+
+def template_for(page, template_path, overrides):
+    # the closest template above the page, or the default
+    directory = posixpath.dirname(page)
+
+    while True:
+        path = overrides.get(directory)
+
+        if path is not None:
+            return path
+
+        if directory == "":
+            return template_path
+
+        directory = posixpath.dirname(directory)
+
+def load_templates(content_dir, template_path):
+    # (overrides, path to Template, path to hash) of the default template
+    # and every override, each parsed once per build
+    overrides = find_templates(content_dir)
+    templates = {}
+    hashes = {}
+
+    for path in [ template_path ] + sorted(overrides.values()):
+        with open(path, "rb") as f:
+            source = f.read()
+
+        templates[path] = Template(source.decode("utf-8"))
+        hashes[path] = hash_bytes(source)
+
+    return overrides, templates, hashes
+
+def output_path(page):
+    return page[:-len(".md")] + ".html"
+
+def extract_title(markdown, default = None):
+    for line in markdown.split("\n"):
+        line = line.strip()
+
+        if line.startswith("# "):
+            return line[2:].strip()
+
+    return default
+
+def reference_targets(references, tag):
+    # unique targets of one kind, sorted for a stable manifest
+    targets = set()
+
+    for reference_tag, target in references:
+        if reference_tag == tag:
+            targets.add(target)
+
+    return sorted(targets)
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+def save_manifest(manifest_path, converter, templates, pages, shard = None):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "converter": converter,
+        "templates": templates,
+        "pages": pages,
+    }
+
+    if shard is not None:
+        manifest["shard"] = list(shard)
+
+    # write to a temporary file first, an interrupted build must not leave
+    # a truncated manifest behind
+    temp_path = manifest_path + ".tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        # json.dumps without indent uses the C encoder
+        f.write(json.dumps(manifest, sort_keys=True))
+
+    os.replace(temp_path, manifest_path)
+
+def stat_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    return [ stat.st_mtime_ns, stat.st_size ]
+
+def is_fresh(entry, source_stat, source_path, dest_path):
+    # output missing or modified since it was written
+    if stat_key(dest_path) != entry["output_stat"]:
+        return False
+
+    if source_stat == entry["source_stat"]:
+        return True
+
+    # touched but not changed
+    return hash_file(source_path) == entry["source_hash"]
+
+def build_page(page, content_dir, dest_dir, template, template_path, cache = None, render_cache = None):
+    source_path = os.path.join(content_dir, page)
+    dest_path = os.path.join(dest_dir, output_path(page))
+
+    with open(source_path, "rb") as f:
+        source = f.read()
+
+    markdown = source.decode("utf-8")
+    rendered = None
+
+    if render_cache is not None:
+        key = render_cache.key(source)
+        rendered = render_cache.get(key)
+
+    if rendered is None:
+        # links and images are recorded while converting, not parsed again
+        references = []
+        content = markdown_to_html(markdown, cache, references)
+
+        rendered = {
+            "html": content,
+            "links": reference_targets(references, "a"),
+            "images": reference_targets(references, "img"),
+        }
+
+        if render_cache is not None:
+            render_cache.put(key, rendered)
+
+    default_title = os.path.splitext(os.path.basename(page))[0]
+    values = { "Title": escape_text(extract_title(markdown, default_title)), "Content": rendered["html"] }
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    # streamed into the file, the page is never joined into one string
+    digest = hashlib.sha256()
+
+    with open(dest_path, "wb") as f:
+        template.write(f, values, digest)
+
+    return {
+        "source_hash": hash_bytes(source),
+        "source_stat": stat_key(source_path),
+        "template": template_path,
+        "output": output_path(page),
+        "output_hash": digest.hexdigest(),
+        "output_stat": stat_key(dest_path),
+        "links": rendered["links"],
+        "images": rendered["images"],
+    }
+
+def make_batches(pages, sizes, jobs):
+    # about four batches per worker so a slow batch does not hold up the
+    # build, but small pages are grouped to amortize the round trip; with
+    # at least as many pages as workers, every worker gets a batch
+    unassigned = sum(sizes)
+    target = max(unassigned // (jobs * 4), BATCH_BYTES)
+    spread = len(pages) >= jobs
+
+    batches = []
+    batch = []
+    batch_size = 0
+
+    for index, (page, size) in enumerate(zip(pages, sizes)):
+        batch.append(page)
+        batch_size += size
+
+        limit = target
+        last = False
+
+        if spread and len(batches) < jobs:
+            wanted = jobs - len(batches)
+            # an even share of the rest for each batch still wanted, and a
+            # batch per page once only that many pages are left
+            limit = min(limit, unassigned // wanted)
+            last = len(pages) - index - 1 < wanted
+
+        if batch_size >= limit or last:
+            batches.append(batch)
+            unassigned -= batch_size
+            batch = []
+            batch_size = 0
+
+    if len(batch) > 0:
+        batches.append(batch)
+
+    return batches
+
+def build_batch(pages, template_paths, content_dir, dest_dir, templates, block_cache, render_cache = None):
+    # template_paths holds the template of each page, templates maps them
+    # to the parsed Template
+    cache = None
+
+    if block_cache > 0:
+        cache = BlockCache(block_cache)
+
+    entries = []
+
+    for page, template_path in zip(pages, template_paths):
+        entries.append(build_page(page, content_dir, dest_dir, templates[template_path], template_path,
+                                  cache, render_cache))
+
+    return entries
+
+def profiled_build_batch(pages, template_paths, content_dir, dest_dir, templates, block_cache,
+                         render_cache = None):
+    # worker side of a profiled build, the profile goes back with the entries
+    with profiling.profile() as profile:
+        entries = build_batch(pages, template_paths, content_dir, dest_dir, templates, block_cache,
+                              render_cache)
+
+    return entries, profile
+
+def build_pages(pages, template_paths, content_dir, dest_dir, templates, jobs, block_cache,
+                render_cache = None):
+    if jobs <= 1 or len(pages) <= 1:
+        return build_batch(pages, template_paths, content_dir, dest_dir, templates, block_cache,
+                           render_cache)
+
+    sizes = []
+
+    for page in pages:
+        sizes.append(os.path.getsize(os.path.join(content_dir, page)))
+
+    batches = make_batches(pages, sizes, jobs)
+
+    if len(batches) == 1:
+        return build_batch(pages, template_paths, content_dir, dest_dir, templates, block_cache,
+                           render_cache)
+
+    profile = profiling.active
+    worker = build_batch if profile is None else profiled_build_batch
+    entries = []
+
+    with ProcessPoolExecutor(min(jobs, len(batches))) as executor:
+        futures = []
+
+        start = 0
+
+        for batch in batches:
+            batch_templates = template_paths[start:start + len(batch)]
+            start += len(batch)
+
+            futures.append(executor.submit(worker, batch, batch_templates, content_dir, dest_dir,
+                                           templates, block_cache, render_cache))
+
+        # collected in batch order, the result does not depend on timing
+        for future in futures:
+            if profile is None:
+                entries.extend(future.result())
+            else:
+                batch_entries, batch_profile = future.result()
+                entries.extend(batch_entries)
+                profile.merge(batch_profile)
+
+    return entries
+
+def build_site(content_dir, template_path, dest_dir, manifest_path, converter = None, jobs = 1,
+               block_cache = BLOCK_CACHE_SIZE, render_cache_dir = None,
+               render_cache_size = RENDER_CACHE_SIZE, shard = None):
+    # shard is (i, N) to build only the pages of shard i, see merge_shards
+    if not os.path.isdir(content_dir):
+        raise FileNotFoundError(f"content directory not found: {content_dir}")
+
+    if converter is None:
+        converter = converter_version()
+
+    overrides, templates, template_hashes = load_templates(content_dir, template_path)
+
+    # rendered pages shared with other builds, keyed by converter and source
+    render_cache = None
+
+    if render_cache_dir is not None:
+        render_cache = RenderCache(render_cache_dir, converter, render_cache_size)
+
+    manifest = load_manifest(manifest_path)
+    old_pages = {}
+    old_templates = {}
+
+    # another shard's manifest says nothing about the pages of this one
+    if manifest is not None and shard is not None and manifest.get("shard", list(shard)) != list(shard):
+        manifest = None
+
+    # a shard built over a full build keeps the other shards' entries, so
+    # the manifest still covers the whole tree
+    if manifest is not None and shard is not None and "shard" not in manifest:
+        manifest_shard = None
+    else:
+        manifest_shard = shard
+
+    if manifest is not None:
+        old_pages = manifest["pages"]
+
+        # a new converter invalidates every page
+        if manifest["converter"] == converter:
+            old_templates = manifest["templates"]
+
+    new_pages = {}
+    result = BuildResult()
+    template_paths = []
+
+    for page in find_pages(content_dir):
+        if shard is not None and page_shard(page, shard[1]) != shard[0]:
+            continue
+
+        entry = old_pages.get(page)
+        source_path = os.path.join(content_dir, page)
+        page_template = template_for(page, template_path, overrides)
+
+        # only the pages of an edited template are rebuilt
+        if entry is not None and entry["template"] == page_template \
+                and template_hashes[page_template] == old_templates.get(page_template):
+            source_stat = stat_key(source_path)
+            dest_path = os.path.join(dest_dir, entry["output"])
+
+            if is_fresh(entry, source_stat, source_path, dest_path):
+                # keep the new stat so a touched file is not hashed again
+                entry["source_stat"] = source_stat
+                new_pages[page] = entry
+                result.skipped.append(page)
+                continue
+
+        result.built.append(page)
+        template_paths.append(page_template)
+
+    entries = build_pages(result.built, template_paths, content_dir, dest_dir, templates,
+                          jobs, block_cache, render_cache)
+
+    for page, entry in zip(result.built, entries):
+        new_pages[page] = entry
+
+    # outputs of deleted pages
+    for page in sorted(old_pages):
+        if page in new_pages:
+            continue
+
+        # another shard's page, its source is not looked at; kept only while
+        # its template and converter are unchanged, so a later full build
+        # does not take a stale output for a fresh one
+        if shard is not None and page_shard(page, shard[1]) != shard[0]:
+            page_template = old_pages[page]["template"]
+
+            if page_template in template_hashes \
+                    and template_hashes[page_template] == old_templates.get(page_template):
+                new_pages[page] = old_pages[page]
+
+            continue
+
+        dest_path = os.path.join(dest_dir, old_pages[page]["output"])
+
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+
+        result.removed.append(page)
+
+    save_manifest(manifest_path, converter, template_hashes, new_pages, manifest_shard)
+
+    if render_cache is not None:
+        render_cache.evict()
+
+    return result
+
+def merge_shards(shards, dest_dir, manifest_path):
+    # combines the outputs and manifests of sharded builds, given as
+    # (dest_dir, manifest_path) pairs, into the tree and manifest a single
+    # build would produce; built lists the outputs copied
+    converter = None
+    templates = {}
+    new_pages = {}
+    sources = {}
+    seen = set()
+    count = None
+
+    for shard_dest, shard_manifest in shards:
+        manifest = load_manifest(shard_manifest)
+
+        if manifest is None or "shard" not in manifest:
+            raise Exception(f"not a shard manifest: {shard_manifest}")
+
+        index, shard_count = manifest["shard"]
+
+        if count is None:
+            count = shard_count
+            converter = manifest["converter"]
+
+        if shard_count != count or index in seen:
+            raise Exception(f"shard {index}/{shard_count} does not match the other shards: {shard_manifest}")
+
+        if manifest["converter"] != converter:
+            raise Exception(f"shard built with a different converter: {shard_manifest}")
+
+        for template_path, template_hash in manifest["templates"].items():
+            if templates.setdefault(template_path, template_hash) != template_hash:
+                raise Exception(f"shard built with a different template: {shard_manifest}")
+
+        seen.add(index)
+
+        for page, entry in manifest["pages"].items():
+            new_pages[page] = entry
+            sources[page] = os.path.join(shard_dest, entry["output"])
+
+    if count is None or len(seen) != count:
+        raise Exception(f"missing shards, got {len(seen)} of {count}")
+
+    manifest = load_manifest(manifest_path)
+    old_pages = {} if manifest is None else manifest["pages"]
+    result = BuildResult()
+
+    for page in sorted(new_pages):
+        entry = new_pages[page]
+        old_entry = old_pages.get(page)
+        dest_path = os.path.join(dest_dir, entry["output"])
+
+        # output already merged and not modified since
+        if old_entry is not None and old_entry["output_hash"] == entry["output_hash"] \
+                and stat_key(dest_path) == old_entry["output_stat"]:
+            entry["output_stat"] = old_entry["output_stat"]
+            result.skipped.append(page)
+            continue
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        shutil.copyfile(sources[page], dest_path)
+
+        entry["output_stat"] = stat_key(dest_path)
+        result.built.append(page)
+
+    for page in sorted(old_pages):
+        if page in new_pages:
+            continue
+
+        dest_path = os.path.join(dest_dir, old_pages[page]["output"])
+
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+
+        result.removed.append(page)
+
+    save_manifest(manifest_path, converter, templates, new_pages)
+
+    return result
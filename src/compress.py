@@ -0,0 +1,214 @@
+import gzip
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from build import hash_bytes, stat_key, walk_pages
+
+# brotli is optional, without it only .gz files are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MANIFEST_VERSION = 1
+
+# outputs that get compressed siblings
+COMPRESS_EXTENSIONS = (".html", ".css")
+
+GZIP_LEVEL = 9
+BROTLI_LEVEL = 11
+
+# smaller files are served as they are, compressing them gains nothing
+COMPRESS_MIN_SIZE = 256
+
+class CompressResult():
+    def __init__(self):
+        self.compressed = []
+        self.skipped = []
+        self.removed = []
+
+    def __repr__(self):
+        return f"CompressResult({len(self.compressed)} compressed, {len(self.skipped)} skipped, {len(self.removed)} removed)"
+
+def compress_formats():
+    formats = [ "gz" ]
+
+    if brotli is not None:
+        formats.append("br")
+
+    return formats
+
+def find_outputs(dest_dir, extensions = COMPRESS_EXTENSIONS):
+    # relative "/" separated paths of the files to compress, sorted
+    outputs = []
+
+    for output, entry in walk_pages(dest_dir, extensions):
+        outputs.append(output)
+
+    outputs.sort()
+
+    return outputs
+
+def compress_data(data, extension, settings):
+    match extension:
+        case "gz":
+            # no timestamp in the header, the same input gives the same bytes
+            return gzip.compress(data, settings["gzip_level"], mtime=0)
+        case "br":
+            return brotli.compress(data, quality=settings["brotli_level"])
+        case _:
+            raise ValueError(f"unknown compression format: {extension}")
+
+def remove_siblings(path, keep = ()):
+    for extension in ("gz", "br"):
+        sibling = f"{path}.{extension}"
+
+        if extension not in keep and os.path.exists(sibling):
+            os.remove(sibling)
+
+def write_sibling(path, data):
+    # a server never sees a missing or partly written sibling, the old
+    # one is replaced in a single rename
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def compress_file(path, settings):
+    # writes the siblings of one file, returns its manifest entry
+    with open(path, "rb") as f:
+        data = f.read()
+
+    formats = ()
+
+    if len(data) >= settings["min_size"]:
+        formats = settings["formats"]
+
+        for extension in formats:
+            write_sibling(f"{path}.{extension}", compress_data(data, extension, settings))
+
+    # below min_size, or a format no longer written
+    remove_siblings(path, formats)
+
+    return {
+        "hash": hash_bytes(data),
+        "stat": stat_key(path),
+    }
+
+def compress_batch(paths, settings):
+    entries = []
+
+    for path in paths:
+        entries.append(compress_file(path, settings))
+
+    return entries
+
+def load_compress_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if manifest.get("version") != COMPRESS_MANIFEST_VERSION:
+        return None
+
+    return manifest
+
+def save_compress_manifest(manifest_path, settings, files):
+    manifest = {
+        "version": COMPRESS_MANIFEST_VERSION,
+        "settings": settings,
+        "files": files,
+    }
+
+    temp_path = manifest_path + ".tmp"
+
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, sort_keys=True))
+
+    os.replace(temp_path, manifest_path)
+
+def is_compressed(entry, path, settings):
+    if entry is None:
+        return False
+
+    stat = stat_key(path)
+
+    # siblings deleted since the last run
+    if stat is not None and stat[1] >= settings["min_size"]:
+        for extension in settings["formats"]:
+            if not os.path.exists(f"{path}.{extension}"):
+                return False
+
+    if stat != entry["stat"]:
+        with open(path, "rb") as f:
+            if hash_bytes(f.read()) != entry["hash"]:
+                return False
+
+        # rewritten with the same content
+        entry["stat"] = stat
+
+    return True
+
+def compress_site(dest_dir, manifest_path, jobs = 1, gzip_level = GZIP_LEVEL,
+                  brotli_level = BROTLI_LEVEL, min_size = COMPRESS_MIN_SIZE,
+                  extensions = COMPRESS_EXTENSIONS):
+    settings = {
+        "formats": compress_formats(),
+        "gzip_level": gzip_level,
+        "brotli_level": brotli_level,
+        "min_size": min_size,
+    }
+
+    manifest = load_compress_manifest(manifest_path)
+    old_files = {}
+
+    # new settings recompress every file
+    if manifest is not None and manifest["settings"] == settings:
+        old_files = manifest["files"]
+
+    new_files = {}
+    result = CompressResult()
+
+    for output in find_outputs(dest_dir, extensions):
+        entry = old_files.get(output)
+
+        if is_compressed(entry, os.path.join(dest_dir, output), settings):
+            new_files[output] = entry
+            result.skipped.append(output)
+        else:
+            result.compressed.append(output)
+
+    paths = [ os.path.join(dest_dir, output) for output in result.compressed ]
+
+    if jobs <= 1 or len(paths) <= 1:
+        entries = compress_batch(paths, settings)
+    else:
+        # about four chunks per worker, as in build.make_batches
+        with ProcessPoolExecutor(min(jobs, len(paths))) as executor:
+            entries = list(executor.map(compress_file, paths, [ settings ] * len(paths),
+                                        chunksize=max(len(paths) // (jobs * 4), 1)))
+
+    for output, entry in zip(result.compressed, entries):
+        new_files[output] = entry
+
+    # siblings of removed outputs
+    if manifest is not None:
+        for output in sorted(manifest["files"]):
+            if output in new_files:
+                continue
+
+            remove_siblings(os.path.join(dest_dir, output))
+            result.removed.append(output)
+
+    save_compress_manifest(manifest_path, settings, new_files)
+
+    return result
@@ -1,98 +1,302 @@
 import re
-from htmlnode import HTMLNode
-from leafnode import LeafNode
+import time
+from collections import OrderedDict
+import profiling
+from htmlnode import HTMLNode, escape_attribute, escape_text
+from leafnode import LeafNode, make_leaf
 from parentnode import ParentNode
-from textnode import TextNode, TextType
+from textnode import NestedTextNode, TextNode, TextSpan, TextType
+
+# markdown text is escaped here, leaf values are html; props_to_html
+# escapes attribute values
+def normal_to_html_node(text_node):
+    return make_leaf(None, escape_text(text_node.text))
+
+def bold_to_html_node(text_node):
+    return make_leaf("b", escape_text(text_node.text))
+
+def italic_to_html_node(text_node):
+    return make_leaf("i", escape_text(text_node.text))
+
+def code_span_to_html_node(text_node):
+    return make_leaf("code", escape_text(text_node.text))
+
+def link_to_html_node(text_node):
+    return make_leaf("a", escape_text(text_node.text), { "href": text_node.url })
+
+def image_to_html_node(text_node):
+    return make_leaf("img", "", { "src": text_node.url, "alt": text_node.text })
+
+# one lookup per node instead of walking the cases of a match statement
+TEXT_NODE_CONVERTERS = {
+    TextType.NORMAL: normal_to_html_node,
+    TextType.BOLD: bold_to_html_node,
+    TextType.ITALIC: italic_to_html_node,
+    TextType.CODE: code_span_to_html_node,
+    TextType.LINK: link_to_html_node,
+    TextType.IMAGE: image_to_html_node,
+}
 
 def text_node_to_html_node(text_node):
+    if text_node.children is not None:
+        return nested_text_node_to_html_node(text_node)
+
+    converter = TEXT_NODE_CONVERTERS.get(text_node.text_type)
+
+    if converter is None:
+        raise Exception("Invalid HTML: text type invalid")
+
+    return converter(text_node)
+
+def text_nodes_to_html_nodes(text_nodes):
+    # converts the nodes of one inline run, with the table and the nested
+    # case looked up once
+    converters = TEXT_NODE_CONVERTERS
+    html_nodes = []
+
+    for text_node in text_nodes:
+        if text_node.children is not None:
+            html_nodes.append(nested_text_node_to_html_node(text_node))
+            continue
+
+        converter = converters.get(text_node.text_type)
+
+        if converter is None:
+            raise Exception("Invalid HTML: text type invalid")
+
+        html_nodes.append(converter(text_node))
+
+    return html_nodes
+
+def nested_text_node_to_html_node(text_node):
+    children = text_nodes_to_html_nodes(text_node.children)
+
     match text_node.text_type:
-        case TextType.NORMAL:
-            return LeafNode(None, text_node.text)
         case TextType.BOLD:
-            return LeafNode("b", text_node.text)
+            return ParentNode("b", children)
         case TextType.ITALIC:
-            return LeafNode("i", text_node.text)
-        case TextType.CODE:
-            return LeafNode("code", text_node.text)
-        case TextType.LINK:
-            return LeafNode("a", text_node.text, { "href": text_node.url })
-        case TextType.IMAGE:
-            return LeafNode("img", "", { "src": text_node.url, "alt": text_node.text })
+            return ParentNode("i", children)
         case _:
-            raise Exception("Invalid HTML: text type invalid")
+            raise Exception("Invalid HTML: text type cannot be nested")
 
-def split_nodes_delimiter(old_nodes, delimiter, text_type):
-    new_nodes = []
+# inline delimiters, longest first; literal spans are not parsed any further
+INLINE_DELIMITERS = (
+    ("**", TextType.BOLD, False),
+    ("*", TextType.ITALIC, False),
+    ("`", TextType.CODE, True),
+)
 
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.NORMAL:
-            new_nodes.append(old_node)
-            continue
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
 
-        split_nodes = []
-        parts = old_node.text.split(delimiter)
+# a span costs three slots and, past the small ints cached up to 256, two
+# int objects; a shorter run far into the text is cheaper as a string
+SPAN_MIN_LENGTH = 32
 
-        if len(parts) % 2 == 0:
-            # no closing delimiter
-            raise Exception("Invalid Markdown: no closing delimiter found")
+def text_run(text, start, end, text_type):
+    # text[start:end] as a node, sliced only when its text is read
+    if end <= 256 or end - start >= SPAN_MIN_LENGTH:
+        return TextSpan(text, start, end, text_type)
 
-        for i in range(len(parts)):
-            if parts[i] == "":
-                # skip empty parts
-                continue
+    return TextNode(text[start:end], text_type)
 
-            if i % 2 == 0:
-                # normal text section
-                split_nodes.append(TextNode(parts[i], TextType.NORMAL))
-            else:
-                split_nodes.append(TextNode(parts[i], text_type))
+class _UnclosedAfterRun(Exception):
+    # a span left unclosed by a scan that read a run such as "***" as two
+    # closing delimiters; only this failure is scanned again
+    pass
 
-        new_nodes.extend(split_nodes)
+def unclosed_delimiter(closed_run):
+    message = "Invalid Markdown: no closing delimiter found"
 
-    return new_nodes
+    if closed_run:
+        return _UnclosedAfterRun(message)
 
-def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return Exception(message)
 
-def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+def scan_inline(text, delimiters = INLINE_DELIMITERS, images = True, links = True):
+    # a run such as "***" first closes two spans, innermost first; when
+    # that leaves a span unclosed, the run closes only the outer span, the
+    # way the split passes read it
+    try:
+        return scan_spans(text, delimiters, images, links, True)
+    except _UnclosedAfterRun:
+        return scan_spans(text, delimiters, images, links, False)
 
-def split_nodes_image(old_nodes):
-    new_nodes = []
+def scan_spans(text, delimiters, images, links, nested_runs):
+    # characters that can start an inline element
+    special = "".join(sorted({ delimiter[0][0] for delimiter in delimiters }))
 
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.NORMAL:
-            new_nodes.append(old_node)
-            continue
+    if images:
+        special += "!"
 
-        images = extract_markdown_images(old_node.text)
+    if links:
+        special += "["
 
-        if len(images) == 0:
-            # no images
-            new_nodes.append(old_node)
-            continue
+    root = []
 
-        original_text = old_node.text
+    if special == "":
+        if text != "":
+            root.append(TextNode(text, TextType.NORMAL))
 
-        for image in images:
-            sections = original_text.split(f"![{image[0]}]({image[1]})", 1)
+        return root
 
-            if len(sections) != 2:
-                raise Exception("Invalid Markdown: image section no closed")
+    finder = re.compile(f"[{re.escape(special)}]")
 
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.NORMAL))
+    # open emphasis spans as (delimiter, text type, parent node list)
+    stack = []
+    # whether a run closed two spans, see scan_inline
+    closed_run = False
+    nodes = root
 
-            new_nodes.append(TextNode(image[0], TextType.IMAGE, image[1]))
+    # start of the pending normal text
+    start = 0
+    match = finder.search(text)
 
-            original_text = sections[1]
+    while match is not None:
+        index = match.start()
+        char = text[index]
+        end = index + 1
 
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.NORMAL))
+        if char == "!" and images:
+            image = IMAGE_PATTERN.match(text, index)
 
-    return new_nodes
+            if image is not None:
+                if index > start:
+                    nodes.append(text_run(text, start, index, TextType.NORMAL))
 
-def split_nodes_link(old_nodes):
+                nodes.append(TextNode(image.group(1), TextType.IMAGE, image.group(2)))
+                start = end = image.end()
+
+        elif char == "[" and links:
+            link = LINK_PATTERN.match(text, index)
+
+            if link is not None:
+                if index > start:
+                    nodes.append(text_run(text, start, index, TextType.NORMAL))
+
+                nodes.append(TextNode(link.group(1), TextType.LINK, link.group(2)))
+                start = end = link.end()
+
+        elif (closing := closing_span(text, index, delimiters, stack, nested_runs)) is not None:
+            position, run = closing
+            closed_run = closed_run or run
+
+            if index > start:
+                nodes.append(text_run(text, start, index, TextType.NORMAL))
+
+            # spans opened inside this one and never closed are text
+            while len(stack) > position + 1:
+                nodes = unclose_span(stack, nodes)
+
+            delimiter, text_type, parent = stack.pop()
+            children = nodes
+            nodes = parent
+
+            if len(children) == 1 and type(children[0]) is TextSpan and children[0].text_type == TextType.NORMAL:
+                child = children[0]
+                nodes.append(TextSpan(child.source, child.start, child.end, text_type))
+            elif len(children) == 1 and children[0].text_type == TextType.NORMAL:
+                nodes.append(TextNode(children[0].text, text_type))
+            elif len(children) > 0:
+                nodes.append(NestedTextNode(text_type, children))
+
+            start = end = index + len(delimiter)
+
+        else:
+            for delimiter, text_type, literal in delimiters:
+                if text.startswith(delimiter, index):
+                    end = index + len(delimiter)
+
+                    if literal:
+                        close = find_literal_close(text, delimiter, end, stack)
+
+                        if close == -1:
+                            if len(stack) == 0:
+                                raise unclosed_delimiter(closed_run)
+
+                            # an unclosed code span inside emphasis is text
+                            break
+
+                        if index > start:
+                            nodes.append(text_run(text, start, index, TextType.NORMAL))
+
+                        if close > end:
+                            nodes.append(text_run(text, end, close, text_type))
+
+                        end = close + len(delimiter)
+                    else:
+                        if index > start:
+                            nodes.append(text_run(text, start, index, TextType.NORMAL))
+
+                        stack.append((delimiter, text_type, nodes))
+                        nodes = []
+
+                    start = end
+                    break
+
+        match = finder.search(text, end)
+
+    if len(stack) > 0:
+        raise unclosed_delimiter(closed_run)
+
+    if len(text) > start:
+        nodes.append(text_run(text, start, len(text), TextType.NORMAL))
+
+    return root
+
+def closing_span(text, index, delimiters, stack, nested_runs = True):
+    # (position in stack of the span the delimiter at index closes, whether
+    # a run closes the innermost span first), None when it opens a new span
+    if len(stack) == 0:
+        return None
+
+    # the longest delimiter here
+    for delimiter, text_type, literal in delimiters:
+        if text.startswith(delimiter, index):
+            break
+    else:
+        return None
+
+    top = stack[-1][0]
+
+    if delimiter == top:
+        return len(stack) - 1, False
+
+    # "***" ends two spans, the innermost first
+    if nested_runs and text.startswith(top, index) and text.startswith(delimiter, index + len(top)):
+        return len(stack) - 1, True
+
+    for position in range(len(stack) - 2, -1, -1):
+        if stack[position][0] == delimiter:
+            return position, False
+
+    return None
+
+def find_literal_close(text, delimiter, end, stack):
+    # where a literal span opened before end closes, -1 when it does not;
+    # inside emphasis it has to close before the innermost span can
+    close = text.find(delimiter, end)
+
+    if close != -1 and len(stack) > 0 and 0 <= text.find(stack[-1][0], end) < close:
+        return -1
+
+    return close
+
+def unclose_span(stack, nodes):
+    # pops a span that was never closed; its delimiter and nodes become
+    # part of the parent, with normal text merged as the split passes did
+    delimiter, text_type, parent = stack.pop()
+
+    for node in [ TextNode(delimiter, TextType.NORMAL) ] + nodes:
+        if node.text_type == TextType.NORMAL and node.children is None and \
+                len(parent) > 0 and parent[-1].text_type == TextType.NORMAL and parent[-1].children is None:
+            parent[-1] = TextNode(parent[-1].text + node.text, TextType.NORMAL)
+        else:
+            parent.append(node)
+
+    return parent
+
+def split_normal_nodes(old_nodes, delimiters, images, links):
     new_nodes = []
 
     for old_node in old_nodes:
@@ -100,137 +304,300 @@ def split_nodes_link(old_nodes):
             new_nodes.append(old_node)
             continue
 
-        links = extract_markdown_links(old_node.text)
+        new_nodes.extend(scan_inline(old_node.text, delimiters, images, links))
 
-        if len(links) == 0:
-            # no links
-            new_nodes.append(old_node)
-            continue
+    return new_nodes
 
-        original_text = old_node.text
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+    return split_normal_nodes(old_nodes, ((delimiter, text_type, False),), False, False)
 
-        for link in links:
-            sections = original_text.split(f"[{link[0]}]({link[1]})", 1)
+def extract_markdown_images(text):
+    return IMAGE_PATTERN.findall(text)
+
+def extract_markdown_links(text):
+    return LINK_PATTERN.findall(text)
 
-            if len(sections) != 2:
-                raise Exception("Invalid Markdown: link section not closed")
+def split_nodes_pattern(old_nodes, pattern, text_type):
+    # one finditer pass per node, slicing by match offsets
+    new_nodes = []
+
+    for old_node in old_nodes:
+        if old_node.text_type != TextType.NORMAL:
+            new_nodes.append(old_node)
+            continue
 
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.NORMAL))
+        text = old_node.text
+        start = 0
+        found = False
 
-            new_nodes.append(TextNode(link[0], TextType.LINK, link[1]))
+        for match in pattern.finditer(text):
+            if match.start() > start:
+                new_nodes.append(TextNode(text[start:match.start()], TextType.NORMAL))
 
-            original_text = sections[1]
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            start = match.end()
+            found = True
 
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.NORMAL))
+        if not found:
+            new_nodes.append(old_node)
+        elif len(text) > start:
+            new_nodes.append(TextNode(text[start:], TextType.NORMAL))
 
     return new_nodes
 
-def text_to_textnodes(text):
-    nodes = [ TextNode(text, TextType.NORMAL) ]
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
 
-    # bold before italic!
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+def split_nodes_link(old_nodes):
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
 
-    return nodes
+def text_to_textnodes(text):
+    # single pass over the text, see scan_inline
+    return scan_inline(text)
 
 def markdown_to_blocks(markdown):
-    blocks = []
-    current_block = []
+    return list(iter_markdown_blocks(markdown.split("\n")))
 
-    lines = markdown.split("\n")
+def iter_markdown_blocks(lines):
+    # lines is any iterable of str, e.g. an open text file; a trailing
+    # newline on each line is ignored, blocks are yielded as they complete
+    current_block = []
 
     for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+
         if len(line) == 0:
             if len(current_block) > 0:
-                blocks.append("\n".join(current_block))
+                yield "\n".join(current_block)
                 current_block = []
         else:
             current_block.append(line.strip())
 
     if len(current_block) > 0:
-        blocks.append("\n".join(current_block))
+        yield "\n".join(current_block)
 
-    return blocks
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+UNORDERED_LIST_ITEM_PATTERN = re.compile(r"[*-] ")
 
-def block_to_block_type(block_text):
-    # heading
-    if re.match(r'^[#]{1,6} .*', block_text):
-        return "heading"
+# a line break followed by a line that is not part of the block type
+QUOTE_BREAK_PATTERN = re.compile(r"\n(?!>)")
+UNORDERED_LIST_BREAK_PATTERN = re.compile(r"\n(?![*-] )")
 
-    # code
-    if block_text.startswith("```") and block_text.endswith("```"):
-        return "code"
+def is_heading(block_text):
+    return HEADING_PATTERN.match(block_text) is not None
 
-    # lists or quote
-    lines = block_text.split("\n")
-    quote_count = 0
-    unordered_list_count = 0
-    ordered_list_count = 1
+def is_code(block_text):
+    return block_text.startswith("```") and block_text.endswith("```")
 
-    for line in lines:
-        if line.startswith(">"):
-            quote_count += 1
+def is_quote(block_text):
+    return QUOTE_BREAK_PATTERN.search(block_text) is None
 
-        if re.match(r'^[*-] .*', line):
-            unordered_list_count +=1
+def is_unordered_list(block_text):
+    if UNORDERED_LIST_ITEM_PATTERN.match(block_text) is None:
+        return False
 
-        if line.startswith(f"{ordered_list_count}. "):
-            ordered_list_count += 1
+    return UNORDERED_LIST_BREAK_PATTERN.search(block_text) is None
 
-    if len(lines) == quote_count:
-        return "quote"
+def is_ordered_list(block_text):
+    # every line starts with its own number, counting from 1
+    number = 1
+    start = 0
 
-    if len(lines) == unordered_list_count:
-        return "unordered_list"
+    while True:
+        if not block_text.startswith(f"{number}. ", start):
+            return False
 
-    if len(lines) == ordered_list_count - 1:
-        return "ordered_list"
+        start = block_text.find("\n", start) + 1
+
+        if start == 0:
+            return True
+
+        number += 1
+
+# the first character of a block decides the only type it can have
+# besides paragraph
+BLOCK_TYPE_CHECKS = {
+    "#": ("heading", is_heading),
+    "`": ("code", is_code),
+    ">": ("quote", is_quote),
+    "*": ("unordered_list", is_unordered_list),
+    "-": ("unordered_list", is_unordered_list),
+    "1": ("ordered_list", is_ordered_list),
+}
+
+def block_to_block_type(block_text):
+    check = BLOCK_TYPE_CHECKS.get(block_text[:1])
+
+    if check is not None and check[1](block_text):
+        return check[0]
 
     return "paragraph"
 
-def markdown_to_html_node(markdown):
-    # split text into blocks
-    markdown_blocks = markdown_to_blocks(markdown)
+class BlockCache():
+    # least recently used cache of converted blocks, keyed by block text;
+    # cached nodes are shared between documents and must not be modified
+    def __init__(self, maxsize = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def get(self, block):
+        entry = self.entries.get(block)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(block)
+
+        return entry
+
+    def put(self, block, block_type, node):
+        if self.maxsize <= 0:
+            return
+
+        self.entries[block] = (block_type, node)
+        self.entries.move_to_end(block)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.maxsize}, {self.hits} hits, {self.misses} misses)"
+
+def block_to_html_node(block, block_type):
+    match (block_type):
+        case "heading":
+            return heading_to_html_node(block)
+        case "code":
+            return code_to_html_node(block)
+        case "quote":
+            return quote_block_to_html_node(block)
+        case "unordered_list":
+            return unordered_list_to_html_node(block)
+        case "ordered_list":
+            return ordered_list_to_html_node(block)
+        case "paragraph":
+            return paragraph_to_html_node(block)
+        case _:
+            raise Exception("Invalid HTML: text type invalid")
+
+def markdown_to_html_node(markdown, cache = None):
+    profile = profiling.active
+
+    if profile is not None:
+        start = time.perf_counter()
+
+    children = list(iter_markdown_to_html_nodes(markdown.split("\n"), cache))
+    node = ParentNode("div", children)
+
+    if profile is not None:
+        profile.record("markdown_to_html_node", time.perf_counter() - start, len(children))
+
+    return node
+
+def iter_markdown_to_html_nodes(lines, cache = None):
+    if profiling.active is not None:
+        yield from profiled_markdown_to_html_nodes(lines, cache, profiling.active)
+        return
+
+    # converts one block at a time, see iter_markdown_blocks
+    for markdown_block in iter_markdown_blocks(lines):
+        if cache is not None:
+            entry = cache.get(markdown_block)
+
+            if entry is not None:
+                yield entry[1]
+                continue
+
+        block_type = block_to_block_type(markdown_block)
+        child = block_to_html_node(markdown_block, block_type)
+
+        if cache is not None:
+            cache.put(markdown_block, block_type, child)
+
+        yield child
+
+def profiled_markdown_to_html_nodes(lines, cache, profile):
+    # same as iter_markdown_to_html_nodes, timing each stage; node counts
+    # and output sizes are measured outside the timed sections
+    blocks = iter_markdown_blocks(lines)
+
+    while True:
+        start = time.perf_counter()
+        markdown_block = next(blocks, None)
 
-    children = []
+        if markdown_block is None:
+            return
+
+        profile.record("markdown_to_blocks", time.perf_counter() - start, 0,
+                       len(markdown_block.encode("utf-8")))
+
+        if cache is not None:
+            entry = cache.get(markdown_block)
+
+            if entry is not None:
+                profile.record(f"cached:{entry[0]}", 0.0, profiling.count_nodes(entry[1]))
+                yield entry[1]
+                continue
 
-    for markdown_block in markdown_blocks:
+        start = time.perf_counter()
         block_type = block_to_block_type(markdown_block)
+        profile.record("block_to_block_type", time.perf_counter() - start)
 
-        match (block_type):
-            case "heading":
-                children.append(heading_to_html_node(markdown_block))
-            case "code":
-                children.append(code_to_html_node(markdown_block))
-            case "quote":
-                children.append(quote_block_to_html_node(markdown_block))
-            case "unordered_list":
-                children.append(unordered_list_to_html_node(markdown_block))
-            case "ordered_list":
-                children.append(ordered_list_to_html_node(markdown_block))
-            case "paragraph":
-                children.append(paragraph_to_html_node(markdown_block))
-            case _:
-                raise Exception("Invalid HTML: text type invalid")
-
-    return ParentNode("div", children)
+        start = time.perf_counter()
+        child = block_to_html_node(markdown_block, block_type)
+        elapsed = time.perf_counter() - start
+
+        size = len(child.to_html().encode("utf-8"))
+        profile.record(f"block:{block_type}", elapsed, profiling.count_nodes(child), size)
+
+        if cache is not None:
+            cache.put(markdown_block, block_type, child)
+
+        yield child
+
+def write_markdown_to_html(lines, out, cache = None):
+    # same output as markdown_to_html_node(...).to_html(), written to out
+    # block by block, so memory is bounded by the largest block
+    out.write("<div>")
+
+    for child in iter_markdown_to_html_nodes(lines, cache):
+        child.write_html(out)
+
+    out.write("</div>")
 
 def text_to_children(text):
+    profile = profiling.active
+
+    if profile is not None:
+        return profiled_text_to_children(text, profile)
+
     # convert to text nodes
     text_nodes = text_to_textnodes(text)
 
     # convert to html nodes
-    html_nodes = []
+    return text_nodes_to_html_nodes(text_nodes)
 
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        html_nodes.append(html_node)
+def profiled_text_to_children(text, profile):
+    start = time.perf_counter()
+    text_nodes = text_to_textnodes(text)
+    profile.record("text_to_textnodes", time.perf_counter() - start, len(text_nodes))
+
+    start = time.perf_counter()
+    html_nodes = text_nodes_to_html_nodes(text_nodes)
+    profile.record("text_node_to_html_node", time.perf_counter() - start, len(html_nodes))
 
     return html_nodes
 
@@ -274,12 +641,33 @@ def ordered_list_to_html_node(block):
 
     return ParentNode("ol", item_list)
 
-def code_to_html_node(block):
+def split_code_block(block):
+    # (language or None, escaped code); code is literal text and is not
+    # parsed for inline markdown; the language is not escaped
     # strip ````
-    content = block.replace("```", "")
+    content = block[3:-3]
+    language = None
+
+    # info string after the opening fence, its first word is the language
+    end = content.find("\n")
+
+    if end != -1:
+        info = content[:end].split()
+        content = content[end:]
+
+        if len(info) > 0:
+            language = info[0]
 
-    children = text_to_children(content)
-    code = ParentNode("code", children)
+    return language, escape_text(content)
+
+def code_to_html_node(block):
+    language, content = split_code_block(block)
+    props = None
+
+    if language is not None:
+        props = { "class": "language-" + language }
+
+    code = LeafNode("code", content, props)
 
     return ParentNode("pre", [code])
 
@@ -298,3 +686,301 @@ def paragraph_to_html_node(block):
     children = text_to_children(paragraph)
 
     return ParentNode("p", children)
+
+# fused conversion, markdown straight to an html string; the output is the
+# same as markdown_to_html_node(markdown).to_html() but no text or html
+# nodes are created
+
+INLINE_TAGS = {
+    TextType.BOLD: "b",
+    TextType.ITALIC: "i",
+    TextType.CODE: "code",
+}
+
+INLINE_SPECIAL_PATTERN = re.compile(r"[*`!\[]")
+
+def markdown_to_html(markdown, cache = None, references = None):
+    # cache is a BlockCache of (html, references) pairs, it must not be
+    # shared with markdown_to_html_node which caches nodes; references, when
+    # given, gets an ("a", href) or ("img", src) pair for every link and
+    # image in document order
+    profile = profiling.active
+
+    if profile is not None:
+        start = time.perf_counter()
+        html = profiled_markdown_to_html(markdown, cache, references, profile)
+        elapsed = time.perf_counter() - start
+
+        profile.record("markdown_to_html", elapsed, profiling.count_html_nodes(html), len(html.encode("utf-8")))
+
+        return html
+
+    parts = [ "<div>" ]
+
+    for markdown_block in iter_markdown_blocks(markdown.split("\n")):
+        if cache is not None:
+            entry = cache.get(markdown_block)
+
+            if entry is not None:
+                block_html, block_references = entry[1]
+                parts.append(block_html)
+
+                if references is not None:
+                    references.extend(block_references)
+
+                continue
+
+        block_type = block_to_block_type(markdown_block)
+
+        if cache is None:
+            parts.append(block_to_html(markdown_block, block_type, references))
+            continue
+
+        block_references = []
+        block_html = block_to_html(markdown_block, block_type, block_references)
+
+        cache.put(markdown_block, block_type, (block_html, block_references))
+
+        if references is not None:
+            references.extend(block_references)
+
+        parts.append(block_html)
+
+    parts.append("</div>")
+
+    return "".join(parts)
+
+def profiled_markdown_to_html(markdown, cache, references, profile):
+    # same as markdown_to_html, timing each stage as
+    # profiled_markdown_to_html_nodes does; block stages include their
+    # inline_to_html calls
+    parts = [ "<div>" ]
+    blocks = iter_markdown_blocks(markdown.split("\n"))
+
+    while True:
+        start = time.perf_counter()
+        markdown_block = next(blocks, None)
+
+        if markdown_block is None:
+            break
+
+        profile.record("markdown_to_blocks", time.perf_counter() - start, 0,
+                       len(markdown_block.encode("utf-8")))
+
+        if cache is not None:
+            entry = cache.get(markdown_block)
+
+            if entry is not None:
+                block_html, block_references = entry[1]
+                profile.record(f"cached:{entry[0]}", 0.0, profiling.count_html_nodes(block_html),
+                               len(block_html.encode("utf-8")))
+                parts.append(block_html)
+
+                if references is not None:
+                    references.extend(block_references)
+
+                continue
+
+        start = time.perf_counter()
+        block_type = block_to_block_type(markdown_block)
+        profile.record("block_to_block_type", time.perf_counter() - start)
+
+        block_references = []
+
+        start = time.perf_counter()
+        block_html = block_to_html(markdown_block, block_type, block_references)
+        elapsed = time.perf_counter() - start
+
+        profile.record(f"block:{block_type}", elapsed, profiling.count_html_nodes(block_html),
+                       len(block_html.encode("utf-8")))
+
+        if cache is not None:
+            cache.put(markdown_block, block_type, (block_html, block_references))
+
+        if references is not None:
+            references.extend(block_references)
+
+        parts.append(block_html)
+
+    parts.append("</div>")
+
+    return "".join(parts)
+
+def block_to_html(block, block_type, references = None):
+    match (block_type):
+        case "heading":
+            index = block.index(" ")
+            return f"<h{index}>{inline_to_html(block[index + 1:], references)}</h{index}>"
+        case "code":
+            language, content = split_code_block(block)
+
+            if language is None:
+                return f"<pre><code>{content}</code></pre>"
+
+            return f"<pre><code class=\"language-{escape_attribute(language)}\">{content}</code></pre>"
+        case "quote":
+            lines = []
+
+            for line in block.split("\n"):
+                lines.append(line[1:].strip())
+
+            content = "\n".join(lines)
+
+            return f"<blockquote>{inline_to_html(content, references)}</blockquote>"
+        case "unordered_list":
+            items = [ "<ul>" ]
+
+            for line in block.split("\n"):
+                items.append(f"<li>{inline_to_html(line[2:], references)}</li>")
+
+            items.append("</ul>")
+
+            return "".join(items)
+        case "ordered_list":
+            items = [ "<ol>" ]
+
+            for line in block.split("\n"):
+                items.append(f"<li>{inline_to_html(line[line.index('. ') + 2:], references)}</li>")
+
+            items.append("</ol>")
+
+            return "".join(items)
+        case "paragraph":
+            paragraph = block.replace("\n", " ")
+            return f"<p>{inline_to_html(paragraph, references)}</p>"
+        case _:
+            raise Exception("Invalid HTML: text type invalid")
+
+def inline_to_html(text, references = None):
+    # scan_inline with the default delimiters, emitting html fragments
+    # instead of text nodes; see markdown_to_html for references
+    profile = profiling.active
+
+    if profile is not None:
+        start = time.perf_counter()
+
+    try:
+        html = inline_spans_to_html(text, references, True)
+    except _UnclosedAfterRun:
+        html = inline_spans_to_html(text, references, False)
+
+    if profile is not None:
+        elapsed = time.perf_counter() - start
+
+        profile.record("inline_to_html", elapsed, profiling.count_html_nodes(html), len(html.encode("utf-8")))
+
+    return html
+
+def inline_spans_to_html(text, references, nested_runs):
+    # references are added once the text converts, a failed pass adds none
+    found = None if references is None else []
+    stack = []
+    # whether a run closed two spans, see scan_inline
+    closed_run = False
+    parts = []
+
+    start = 0
+    match = INLINE_SPECIAL_PATTERN.search(text)
+
+    while match is not None:
+        index = match.start()
+        char = text[index]
+        end = index + 1
+
+        if char == "!":
+            image = IMAGE_PATTERN.match(text, index)
+
+            if image is not None:
+                if index > start:
+                    parts.append(escape_text(text[start:index]))
+
+                parts.append(f"<img src=\"{escape_attribute(image.group(2))}\" "
+                             f"alt=\"{escape_attribute(image.group(1))}\"></img>")
+
+                if found is not None:
+                    found.append(("img", image.group(2)))
+
+                start = end = image.end()
+
+        elif char == "[":
+            link = LINK_PATTERN.match(text, index)
+
+            if link is not None:
+                if index > start:
+                    parts.append(escape_text(text[start:index]))
+
+                parts.append(f"<a href=\"{escape_attribute(link.group(2))}\">{escape_text(link.group(1))}</a>")
+
+                if found is not None:
+                    found.append(("a", link.group(2)))
+
+                start = end = link.end()
+
+        elif (closing := closing_span(text, index, INLINE_DELIMITERS, stack, nested_runs)) is not None:
+            position, run = closing
+            closed_run = closed_run or run
+
+            if index > start:
+                parts.append(escape_text(text[start:index]))
+
+            # as in scan_inline, unclosed inner spans are text
+            while len(stack) > position + 1:
+                delimiter, text_type, parent = stack.pop()
+                parent.append(delimiter)
+                parent.extend(parts)
+                parts = parent
+
+            delimiter, text_type, parent = stack.pop()
+
+            # empty spans are dropped, as in scan_inline
+            if len(parts) > 0:
+                tag = INLINE_TAGS[text_type]
+                parent.append(f"<{tag}>{''.join(parts)}</{tag}>")
+
+            parts = parent
+            start = end = index + len(delimiter)
+
+        else:
+            for delimiter, text_type, literal in INLINE_DELIMITERS:
+                if text.startswith(delimiter, index):
+                    end = index + len(delimiter)
+
+                    if literal:
+                        close = find_literal_close(text, delimiter, end, stack)
+
+                        if close == -1:
+                            if len(stack) == 0:
+                                raise unclosed_delimiter(closed_run)
+
+                            break
+
+                        if index > start:
+                            parts.append(escape_text(text[start:index]))
+
+                        if close > end:
+                            tag = INLINE_TAGS[text_type]
+                            parts.append(f"<{tag}>{escape_text(text[end:close])}</{tag}>")
+
+                        end = close + len(delimiter)
+                    else:
+                        if index > start:
+                            parts.append(escape_text(text[start:index]))
+
+                        stack.append((delimiter, text_type, parts))
+                        parts = []
+
+                    start = end
+                    break
+
+        match = INLINE_SPECIAL_PATTERN.search(text, end)
+
+    if len(stack) > 0:
+        raise unclosed_delimiter(closed_run)
+
+    if len(text) > start:
+        parts.append(escape_text(text[start:]))
+
+    if found is not None:
+        references.extend(found)
+
+    return "".join(parts)
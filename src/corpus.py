@@ -0,0 +1,143 @@
+import random
+
+# synthetic markdown for benchmarks; the same seed always gives the same
+# corpus, independent of PYTHONHASHSEED
+
+CORPUS_KINDS = ("paragraphs", "links", "lists", "code", "nested")
+
+# blocks per page
+CORPUS_SIZES = {
+    "small": 10,
+    "medium": 100,
+    "large": 1000,
+}
+
+WORDS = (
+    "static", "site", "generator", "markdown", "block", "inline", "node",
+    "page", "render", "build", "content", "template", "cache", "text",
+    "paragraph", "list", "quote", "code", "link", "image", "heading",
+    "the", "a", "of", "and", "with", "from", "into", "over", "every",
+)
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def inline_span(rng):
+    choice = rng.randrange(6)
+
+    match choice:
+        case 0:
+            return f"**{words(rng, 2)}**"
+        case 1:
+            return f"*{words(rng, 2)}*"
+        case 2:
+            return f"`{words(rng, 1)}()`"
+        case 3:
+            return f"[{words(rng, 2)}](https://example.com/{rng.randrange(1000)})"
+        case 4:
+            return f"![{words(rng, 2)}](/images/{rng.randrange(1000)}.png)"
+        case _:
+            return words(rng, 3)
+
+def inline_text(rng, count, span_ratio = 0.2):
+    parts = []
+
+    for _ in range(count):
+        if rng.random() < span_ratio:
+            parts.append(inline_span(rng))
+        else:
+            parts.append(words(rng, rng.randint(1, 6)))
+
+    return " ".join(parts)
+
+def heading_block(rng):
+    return "#" * rng.randint(1, 6) + " " + words(rng, rng.randint(2, 6))
+
+def paragraph_block(rng):
+    lines = []
+
+    for _ in range(rng.randint(1, 6)):
+        lines.append(inline_text(rng, rng.randint(3, 12)))
+
+    return "\n".join(lines)
+
+def link_block(rng):
+    links = []
+
+    for _ in range(rng.randint(10, 60)):
+        links.append(f"[{words(rng, 2)}](/docs/{rng.randrange(10000)}.html)")
+
+    return ", ".join(links)
+
+def list_block(rng):
+    items = []
+    ordered = rng.random() < 0.5
+
+    for i in range(rng.randint(3, 20)):
+        marker = f"{i + 1}." if ordered else rng.choice("*-")
+        items.append(f"{marker} {inline_text(rng, rng.randint(1, 3))}")
+
+    return "\n".join(items)
+
+def quote_block(rng):
+    lines = []
+
+    for _ in range(rng.randint(1, 5)):
+        lines.append(f"> {inline_text(rng, rng.randint(1, 4))}")
+
+    return "\n".join(lines)
+
+def code_block(rng):
+    # no inline delimiters, so the inline reference path in benchmark.py can
+    # parse the same blocks
+    lines = [ "```" ]
+
+    for i in range(rng.randint(3, 30)):
+        lines.append(f"{rng.choice(WORDS)}_{i} = {rng.choice(WORDS)}({rng.randrange(100)})")
+
+    lines.append("```")
+
+    return "\n".join(lines)
+
+def nested_block(rng):
+    # emphasis nested up to 16 levels, alternating italic and bold
+    text = words(rng, 3)
+
+    for level in range(rng.randint(4, 16)):
+        delimiter = "*" if level % 2 == 0 else "**"
+        text = f"{words(rng, 2)} {delimiter}{text}{delimiter} {words(rng, 2)}"
+
+    return text
+
+# block builders and their weights per corpus kind
+CORPUS_MIX = {
+    "paragraphs": ((paragraph_block, 8), (heading_block, 1), (quote_block, 1)),
+    "links": ((link_block, 8), (paragraph_block, 1), (heading_block, 1)),
+    "lists": ((list_block, 8), (paragraph_block, 1), (heading_block, 1)),
+    "code": ((code_block, 6), (paragraph_block, 3), (heading_block, 1)),
+    "nested": ((nested_block, 7), (quote_block, 2), (heading_block, 1)),
+}
+
+def generate_page(kind, blocks, seed = 0):
+    rng = random.Random(f"{kind}:{blocks}:{seed}")
+
+    builders = [ builder for builder, weight in CORPUS_MIX[kind] ]
+    weights = [ weight for builder, weight in CORPUS_MIX[kind] ]
+
+    result = []
+
+    for _ in range(blocks):
+        builder = rng.choices(builders, weights)[0]
+        result.append(builder(rng))
+
+    return "\n\n".join(result)
+
+def generate_corpus(seed = 0, kinds = CORPUS_KINDS, sizes = CORPUS_SIZES):
+    # name such as "links/medium" to markdown text
+    corpus = {}
+
+    for kind in kinds:
+        for size in sizes:
+            corpus[f"{kind}/{size}"] = generate_page(kind, sizes[size], seed)
+
+    return corpus
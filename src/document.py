@@ -0,0 +1,57 @@
+from convert import block_to_block_type, block_to_html_node, markdown_to_blocks
+from parentnode import ParentNode
+
+class Document():
+    # a converted markdown document that can be updated in place; blocks
+    # that did not change keep their nodes and their rendered html
+    def __init__(self, markdown = ""):
+        self.blocks = []
+        self.hashes = []
+        self.fragments = []
+        self.node = ParentNode("div", [])
+
+        self.update(markdown)
+
+    def update(self, markdown):
+        # returns (start, end, fragments): the old children start:end were
+        # replaced by new children rendering to fragments
+        blocks = markdown_to_blocks(markdown)
+        hashes = [ hash(block) for block in blocks ]
+
+        start = 0
+        limit = min(len(blocks), len(self.blocks))
+
+        while start < limit and self.same_block(start, start, blocks, hashes):
+            start += 1
+
+        # unchanged blocks at the end, not overlapping the unchanged start
+        old_end = len(self.blocks)
+        new_end = len(blocks)
+
+        while old_end > start and new_end > start and self.same_block(old_end - 1, new_end - 1, blocks, hashes):
+            old_end -= 1
+            new_end -= 1
+
+        children = []
+        fragments = []
+
+        for block in blocks[start:new_end]:
+            child = block_to_html_node(block, block_to_block_type(block))
+            children.append(child)
+            fragments.append(child.to_html())
+
+        self.node.children[start:old_end] = children
+        self.fragments[start:old_end] = fragments
+        self.blocks = blocks
+        self.hashes = hashes
+
+        return start, old_end, fragments
+
+    def same_block(self, old_index, new_index, blocks, hashes):
+        return self.hashes[old_index] == hashes[new_index] and self.blocks[old_index] == blocks[new_index]
+
+    def to_html(self):
+        return "<div>" + "".join(self.fragments) + "</div>"
+
+    def __repr__(self):
+        return f"Document({len(self.blocks)} blocks)"
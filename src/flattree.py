@@ -0,0 +1,226 @@
+from array import array
+from leafnode import make_leaf
+from parentnode import ParentNode
+
+# missing parent, child, sibling, props or text in the index arrays
+NONE = -1
+
+class FlatTree():
+    # an html tree as parallel arrays indexed by node, in document order
+    # with the root at 0; a node is a tag id, links to its parent, first
+    # child and next sibling, a props id, and a slice of one text buffer,
+    # so a node costs a few machine ints instead of an object, a children
+    # list and a props tuple
+    def __init__(self, node):
+        # tag ids index tags, props ids index attributes, as (name, value)
+        # tuples, and attributes_html
+        self.tags = []
+        self.attributes = []
+        self.attributes_html = []
+
+        self.tag = array("i")
+        self.parent = array("i")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.props = array("i")
+        # leaf values as slices of text, parents have length NONE
+        self.text_offset = array("i")
+        self.text_length = array("i")
+        self.text = ""
+
+        tag_ids = {}
+        props_ids = {}
+        # equal values share one slice of the buffer
+        offsets = {}
+        parts = []
+        size = 0
+
+        # last child added to each parent, to link the next sibling
+        last_child = {}
+        pending = [ (node, NONE) ]
+
+        while len(pending) > 0:
+            node, parent = pending.pop()
+            index = len(self.tag)
+
+            tag_id = tag_ids.get(node.tag)
+
+            if tag_id is None:
+                tag_id = tag_ids[node.tag] = len(self.tags)
+                self.tags.append(node.tag)
+
+            props_id = NONE
+
+            if node._props is not None:
+                props = tuple(node._props.items())
+                props_id = props_ids.get(props)
+
+                if props_id is None:
+                    props_id = props_ids[props] = len(self.attributes)
+                    self.attributes.append(props)
+                    self.attributes_html.append(node.props_to_html())
+
+            if node.children is not None:
+                if node.tag is None:
+                    raise ValueError("Invalid HTML: no tag")
+
+                offset = 0
+                length = NONE
+
+                # reversed, so children are popped in document order
+                for child in reversed(node.children):
+                    pending.append((child, index))
+            else:
+                if node.value is None:
+                    raise ValueError("Invalid HTML: no value")
+
+                offset = offsets.get(node.value)
+                length = len(node.value)
+
+                if offset is None:
+                    offset = offsets[node.value] = size
+                    parts.append(node.value)
+                    size += length
+
+            self.tag.append(tag_id)
+            self.parent.append(parent)
+            self.first_child.append(NONE)
+            self.next_sibling.append(NONE)
+            self.props.append(props_id)
+            self.text_offset.append(offset)
+            self.text_length.append(length)
+
+            if parent != NONE:
+                previous = last_child.get(parent)
+
+                if previous is None:
+                    self.first_child[parent] = index
+                else:
+                    self.next_sibling[previous] = index
+
+                last_child[parent] = index
+
+        self.text = "".join(parts)
+
+    def __len__(self):
+        return len(self.tag)
+
+    def value(self, index):
+        # the text of a leaf, None for a parent
+        length = self.text_length[index]
+
+        if length == NONE:
+            return None
+
+        offset = self.text_offset[index]
+
+        return self.text[offset:offset + length]
+
+    def props_html(self, index):
+        props_id = self.props[index]
+
+        if props_id == NONE:
+            return ""
+
+        return self.attributes_html[props_id]
+
+    def children(self, index):
+        # child indexes of a node in document order
+        result = []
+        child = self.first_child[index]
+
+        while child != NONE:
+            result.append(child)
+            child = self.next_sibling[child]
+
+        return result
+
+    def render(self, emit, index = 0):
+        # emit is called with each fragment in document order, the same
+        # fragments ParentNode.iter_html yields; the links replace the stacks
+        tags = self.tags
+        tag = self.tag
+        parent = self.parent
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        text = self.text
+        text_offset = self.text_offset
+        text_length = self.text_length
+        props = self.props
+        # NONE indexes the last entry
+        attributes_html = self.attributes_html + [ "" ]
+
+        node = index
+
+        while True:
+            name = tags[tag[node]]
+            length = text_length[node]
+
+            if length != NONE:
+                offset = text_offset[node]
+                value = text[offset:offset + length]
+
+                if name is None:
+                    emit(value)
+                else:
+                    emit(f"<{name}{attributes_html[props[node]]}>{value}</{name}>")
+            else:
+                emit(f"<{name}{attributes_html[props[node]]}>")
+                child = first_child[node]
+
+                if child != NONE:
+                    node = child
+                    continue
+
+                emit(f"</{name}>")
+
+            # the next sibling, closing every parent that has none left
+            while node != index:
+                sibling = next_sibling[node]
+
+                if sibling != NONE:
+                    node = sibling
+                    break
+
+                node = parent[node]
+                emit(f"</{tags[tag[node]]}>")
+            else:
+                return
+
+    def to_html(self, index = 0):
+        parts = []
+        self.render(parts.append, index)
+
+        return "".join(parts)
+
+    def write_html(self, out, index = 0):
+        self.render(out.write, index)
+
+    def to_html_node(self, index = 0):
+        # the subtree at index as LeafNode and ParentNode objects
+        root = None
+        pending = [ (index, None) ]
+
+        while len(pending) > 0:
+            node, children = pending.pop()
+            tag = self.tags[self.tag[node]]
+            props_id = self.props[node]
+            props = None if props_id == NONE else dict(self.attributes[props_id])
+
+            if self.text_length[node] != NONE:
+                html_node = make_leaf(tag, self.value(node), props)
+            else:
+                html_node = ParentNode(tag, [], props)
+
+                for child in reversed(self.children(node)):
+                    pending.append((child, html_node.children))
+
+            if children is None:
+                root = html_node
+            else:
+                children.append(html_node)
+
+        return root
+
+    def __repr__(self):
+        return f"FlatTree({len(self.tag)} nodes, {len(self.text)} chars)"
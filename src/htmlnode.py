@@ -1,23 +1,74 @@
+from types import MappingProxyType
+
+def escape_text(text):
+    # chained str.replace beats str.translate, whose multi-character
+    # replacements take a slow path; most text has nothing to escape and
+    # only pays for the scans
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+
+    return text
+
+def escape_attribute(value):
+    # same characters as html.escape(value, quote=True)
+    value = escape_text(value)
+
+    if "\"" in value:
+        value = value.replace("\"", "&quot;")
+
+    if "'" in value:
+        value = value.replace("'", "&#x27;")
+
+    return value
+
 class HTMLNode():
+    # no per-instance __dict__, pages create a lot of nodes
+    __slots__ = ("tag", "value", "children", "_props", "_props_html")
+
     def __init__(self, tag = None, value = None, children = None, props = None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
+    @property
+    def props(self):
+        # a read-only view, writing through it raises TypeError instead of
+        # changing a copy
+        if self._props is None:
+            return None
+
+        return MappingProxyType(self._props)
+
+    @props.setter
+    def props(self, props):
+        # props cannot change in place, so they are serialized once here
+        if props is None:
+            self._props = None
+            self._props_html = ""
+        else:
+            self._props = dict(props)
+            self._props_html = "".join(f" {attr}=\"{escape_attribute(str(value))}\"" for attr, value in self._props.items())
+
     def to_html(self):
         raise NotImplementedError
 
-    def props_to_html(self):
-        if self.props is None:
-            return ""
-
-        result = ""
+    def iter_html(self):
+        raise NotImplementedError
 
-        for attr in self.props:
-            result += f" {attr}=\"{self.props[attr]}\""
+    def write_html(self, out):
+        # out is any object with a write method, e.g. a file or StringIO
+        for fragment in self.iter_html():
+            out.write(fragment)
 
-        return result
+    def props_to_html(self):
+        return self._props_html
 
     def __repr__(self):
-        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
+        return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self._props})"
@@ -1,6 +1,8 @@
 from htmlnode import HTMLNode
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props = None):
         super().__init__(tag, value, None, props)
 
@@ -15,5 +17,24 @@ class LeafNode(HTMLNode):
 
         return f"<{self.tag}{props}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
     def __repr__(self):
-        return f"LeafNode({self.tag}, {self.value}, {self.props})"
+        return f"LeafNode({self.tag}, {self.value}, {self._props})"
+
+def make_leaf(tag, value, props = None):
+    # same node as LeafNode(tag, value, props) without the __init__ chain,
+    # for converters that create one node per inline span
+    node = object.__new__(LeafNode)
+    node.tag = tag
+    node.value = value
+    node.children = None
+
+    if props is None:
+        node._props = None
+        node._props_html = ""
+    else:
+        node.props = props
+
+    return node
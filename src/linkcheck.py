@@ -0,0 +1,94 @@
+import os
+import posixpath
+import re
+from urllib.parse import unquote
+from build import load_manifest, walk_pages
+
+# targets with a scheme, such as https: or mailto:, or protocol relative
+EXTERNAL_PATTERN = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:|//")
+
+class CheckResult():
+    def __init__(self):
+        self.pages = 0
+        self.checked = 0
+        self.external = 0
+        # (page, kind, target) for every target that does not resolve
+        self.broken = []
+
+    def __repr__(self):
+        return f"CheckResult({self.pages} pages, {self.checked} checked, {len(self.broken)} broken)"
+
+def list_outputs(dest_dir):
+    # every file in the output tree, as "/" separated paths
+    files = set()
+
+    for output, entry in walk_pages(dest_dir, ""):
+        files.add(output)
+
+    return files
+
+def resolve_target(output, target):
+    # the file in the output tree a target of the page output points to,
+    # None for targets outside the site
+    if EXTERNAL_PATTERN.match(target):
+        return None
+
+    path = unquote(target.split("#", 1)[0].split("?", 1)[0])
+
+    # a fragment of the page itself
+    if path == "":
+        return output
+
+    directory = path.endswith("/")
+
+    if path.startswith("/"):
+        path = path[1:]
+    else:
+        path = posixpath.join(posixpath.dirname(output), path)
+
+    # outside the output tree when it starts with "..", which never exists
+    path = posixpath.normpath(path)
+
+    if path == ".":
+        path = ""
+
+    if path == "" or directory:
+        return posixpath.join(path, "index.html")
+
+    return path
+
+def target_exists(path, files):
+    if path in files:
+        return True
+
+    # a directory, served by its index
+    return posixpath.join(path, "index.html") in files
+
+def check_site(dest_dir, manifest_path):
+    # checks the links and images the build recorded against one listing
+    # of the output tree, without reading any page
+    manifest = load_manifest(manifest_path)
+
+    if manifest is None:
+        raise Exception(f"no build manifest: {manifest_path}")
+
+    files = list_outputs(dest_dir) if os.path.isdir(dest_dir) else set()
+    result = CheckResult()
+
+    for page, entry in sorted(manifest["pages"].items()):
+        result.pages += 1
+
+        for kind, targets in (("link", entry["links"]), ("image", entry["images"])):
+            for target in targets:
+                path = resolve_target(entry["output"], target)
+
+                if path is None:
+                    result.external += 1
+                    continue
+
+                result.checked += 1
+
+                if not target_exists(path, files):
+                    result.broken.append((page, kind, target))
+
+    return result
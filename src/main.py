@@ -1,11 +1,157 @@
+import argparse
+import os
 import sys
-from textnode import TextType
-from textnode import TextNode
+import time
+from build import BLOCK_CACHE_SIZE, build_site, merge_shards, parse_shard
+from compress import BROTLI_LEVEL, COMPRESS_MIN_SIZE, GZIP_LEVEL, brotli, compress_site
+from linkcheck import check_site
+import profiling
+from rendercache import RENDER_CACHE_SIZE
+from serve import serve
+
+def build(args):
+    start = time.perf_counter()
+
+    jobs = args.jobs
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    profile = None
+
+    options = {
+        "jobs": jobs,
+        "block_cache": args.block_cache,
+        "render_cache_dir": args.render_cache,
+        "render_cache_size": args.render_cache_size * 1024 * 1024,
+        "shard": args.shard,
+    }
+
+    if args.profile:
+        with profiling.profile() as profile:
+            result = build_site(args.content, args.template, args.dest, args.manifest, **options)
+    else:
+        result = build_site(args.content, args.template, args.dest, args.manifest, **options)
+
+    elapsed = time.perf_counter() - start
+
+    print(f"built {len(result.built)}, skipped {len(result.skipped)}, "
+          f"removed {len(result.removed)} pages in {elapsed:.3f}s")
+
+    if args.compress:
+        start = time.perf_counter()
+
+        if brotli is None:
+            print("brotli is not installed, writing .gz files only", file=sys.stderr)
+
+        compressed = compress_site(args.dest, args.compress_manifest, jobs, args.gzip_level,
+                                   args.brotli_level, args.compress_min_size)
+
+        elapsed = time.perf_counter() - start
+
+        print(f"compressed {len(compressed.compressed)}, skipped {len(compressed.skipped)}, "
+              f"removed {len(compressed.removed)} files in {elapsed:.3f}s")
+
+    if profile is not None:
+        print(profile.report())
+
+    return 0
+
+def merge(args):
+    start = time.perf_counter()
+
+    result = merge_shards(args.shard, args.dest, args.manifest)
+
+    elapsed = time.perf_counter() - start
+
+    print(f"merged {len(result.built)}, unchanged {len(result.skipped)}, "
+          f"removed {len(result.removed)} pages in {elapsed:.3f}s")
+
+    return 0
+
+def check(args):
+    start = time.perf_counter()
+
+    result = check_site(args.dest, args.manifest)
+
+    elapsed = time.perf_counter() - start
+
+    for page, kind, target in result.broken:
+        print(f"{page}: broken {kind} {target}")
+
+    print(f"checked {result.checked} targets on {result.pages} pages, skipped {result.external} external, "
+          f"{len(result.broken)} broken in {elapsed:.3f}s")
+
+    return 1 if len(result.broken) > 0 else 0
+
+def preview(args):
+    return serve(args.content, args.template, args.dest, args.manifest,
+                 args.host, args.port, args.interval, args.block_cache)
+
+def add_site_arguments(parser):
+    parser.add_argument("--content", default="content", help="markdown source directory")
+    parser.add_argument("--template", default="template.html", help="page template")
+    parser.add_argument("--dest", default="public", help="output directory")
+    parser.add_argument("--manifest", default=".build-manifest.json",
+                        help="hashes of the previous build, used to skip unchanged pages")
+    parser.add_argument("--block-cache", type=int, default=BLOCK_CACHE_SIZE,
+                        help="converted blocks cached per worker, 0 to disable")
 
 def main() -> int:
-    node = TextNode("This is a text node", TextType.BOLD, "https://www.boot.dev")
+    parser = argparse.ArgumentParser(description="Static site generator.")
+    commands = parser.add_subparsers(dest="command")
+
+    build_parser = commands.add_parser("build", help="convert the content directory to html (default)")
+    add_site_arguments(build_parser)
+    build_parser.add_argument("--jobs", "-j", type=int, default=1,
+                              help="worker processes, 0 for one per cpu")
+    build_parser.add_argument("--profile", action="store_true",
+                              help="print time, calls, nodes and bytes per conversion stage")
+    build_parser.add_argument("--shard", type=parse_shard, metavar="I/N",
+                              help="build only shard I of N, pages are split by a hash of their path")
+    build_parser.add_argument("--render-cache", metavar="DIR",
+                              help="directory of rendered pages shared between builds, e.g. a CI cache")
+    build_parser.add_argument("--render-cache-size", type=int, default=RENDER_CACHE_SIZE // (1024 * 1024),
+                              help="size bound of the render cache in MiB")
+    build_parser.add_argument("--compress", action="store_true",
+                              help="write .gz and .br siblings of the html and css outputs")
+    build_parser.add_argument("--compress-manifest", default=".compress-manifest.json",
+                              help="hashes of the last compressed outputs, used to skip unchanged files")
+    build_parser.add_argument("--gzip-level", type=int, default=GZIP_LEVEL, help="gzip level, 1 to 9")
+    build_parser.add_argument("--brotli-level", type=int, default=BROTLI_LEVEL, help="brotli quality, 0 to 11")
+    build_parser.add_argument("--compress-min-size", type=int, default=COMPRESS_MIN_SIZE,
+                              help="smallest file in bytes that gets compressed siblings")
+    build_parser.set_defaults(func=build)
+
+    merge_parser = commands.add_parser("merge", help="combine the outputs of sharded builds")
+    merge_parser.add_argument("--shard", nargs=2, action="append", required=True, metavar=("DEST", "MANIFEST"),
+                              help="output directory and manifest of one shard, once per shard")
+    merge_parser.add_argument("--dest", default="public", help="output directory")
+    merge_parser.add_argument("--manifest", default=".build-manifest.json", help="merged manifest")
+    merge_parser.set_defaults(func=merge)
+
+    check_parser = commands.add_parser("check", help="find broken internal links and images of the last build")
+    check_parser.add_argument("--dest", default="public", help="output directory")
+    check_parser.add_argument("--manifest", default=".build-manifest.json",
+                              help="manifest of the build, it lists the links and images of every page")
+    check_parser.set_defaults(func=check)
+
+    serve_parser = commands.add_parser("serve", help="serve the output directory, rebuilding pages on save")
+    add_site_arguments(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    serve_parser.add_argument("--interval", type=float, default=0.05,
+                              help="seconds between checks for changed files")
+    serve_parser.set_defaults(func=preview)
+
+    argv = sys.argv[1:]
+
+    if len(argv) == 0:
+        argv = [ "build" ]
+
+    args = parser.parse_args(argv)
 
-    print(node)
+    return args.func(args)
 
 if __name__ == '__main__':
     sys.exit(main())
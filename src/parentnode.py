@@ -1,10 +1,50 @@
 from htmlnode import HTMLNode
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props = None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def render(self, emit):
+        # emit is called with each fragment in document order
+        for fragment in self.iter_html():
+            emit(fragment)
+
+    def iter_html(self):
+        # open tags and child iterators live on explicit stacks instead of
+        # Python frames, so nesting depth is not limited by the recursion
+        # limit; to_html, render and HTMLNode.write_html all drive this
+        # traversal
+        yield self.start_tag()
+
+        tags = [ self.tag ]
+        children = iter(self.children)
+        pending = [ children ]
+
+        while True:
+            for child in children:
+                if isinstance(child, ParentNode):
+                    yield child.start_tag()
+                    tags.append(child.tag)
+                    children = iter(child.children)
+                    pending.append(children)
+                    break
+
+                yield child.to_html()
+            else:
+                yield f"</{tags.pop()}>"
+                pending.pop()
+
+                if len(pending) == 0:
+                    return
+
+                children = pending[-1]
+
+    def start_tag(self):
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
 
@@ -13,14 +53,7 @@ class ParentNode(HTMLNode):
 
         props = self.props_to_html();
 
-        result = f"<{self.tag}{props}>"
-
-        for child in self.children:
-            result += child.to_html()
-
-        result += f"</{self.tag}>"
-
-        return result
+        return f"<{self.tag}{props}>"
 
     def __repr__(self):
-        return f"ParentNode({self.tag}, {self.children}, {self.props})"
+        return f"ParentNode({self.tag}, {self.children}, {self._props})"
@@ -0,0 +1,133 @@
+import re
+from contextlib import contextmanager
+
+# profile that instrumented functions record into, None when profiling is
+# off; the instrumented functions check it once per call
+active = None
+
+class StageStats():
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.nodes = 0
+        self.bytes = 0
+
+    def __repr__(self):
+        return f"StageStats({self.calls} calls, {self.seconds:.6f}s, {self.nodes} nodes, {self.bytes} bytes)"
+
+class Profile():
+    def __init__(self):
+        # stage name to StageStats, in first recorded order
+        self.stages = {}
+
+    def record(self, stage, seconds, nodes = 0, size = 0):
+        stats = self.stages.get(stage)
+
+        if stats is None:
+            stats = StageStats()
+            self.stages[stage] = stats
+
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.nodes += nodes
+        stats.bytes += size
+
+    def merge(self, other):
+        for stage, other_stats in other.stages.items():
+            stats = self.stages.get(stage)
+
+            if stats is None:
+                stats = StageStats()
+                self.stages[stage] = stats
+
+            stats.calls += other_stats.calls
+            stats.seconds += other_stats.seconds
+            stats.nodes += other_stats.nodes
+            stats.bytes += other_stats.bytes
+
+    def to_dict(self):
+        result = {}
+
+        for stage, stats in self.stages.items():
+            result[stage] = {
+                "calls": stats.calls,
+                "seconds": stats.seconds,
+                "nodes": stats.nodes,
+                "bytes": stats.bytes,
+            }
+
+        return result
+
+    def report(self):
+        # stages overlap, e.g. block:paragraph includes its text_to_textnodes
+        lines = [ f"{'stage':<28} {'calls':>9} {'total ms':>11} {'avg us':>9} {'nodes':>10} {'bytes':>12}" ]
+
+        for stage, stats in self.stages.items():
+            average = stats.seconds / stats.calls * 1000000 if stats.calls > 0 else 0.0
+
+            # stages such as block splitting do not build nodes
+            nodes = stats.nodes if stats.nodes > 0 else "-"
+
+            lines.append(f"{stage:<28} {stats.calls:>9} {stats.seconds * 1000:>11.2f} "
+                         f"{average:>9.2f} {nodes:>10} {stats.bytes:>12}")
+
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"Profile({self.stages})"
+
+@contextmanager
+def profile(target = None):
+    # records into target, or a new Profile, until the block exits
+    global active
+
+    if target is None:
+        target = Profile()
+
+    previous = active
+    active = target
+
+    try:
+        yield target
+    finally:
+        active = previous
+
+def count_nodes(node):
+    # nodes in an HTMLNode or TextNode tree
+    count = 0
+    pending = [ node ]
+
+    while len(pending) > 0:
+        node = pending.pop()
+        count += 1
+
+        if node.children is not None:
+            pending.extend(node.children)
+
+    return count
+
+# elements the converters always build as ParentNode, even around text only
+PARENT_TAGS = { "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "blockquote", "pre" }
+
+HTML_TOKEN_PATTERN = re.compile(r"<(/?)([a-z0-9]*)[^>]*>|[^<]+")
+
+def count_html_nodes(html):
+    # nodes of the tree markdown_to_html_node would build for html rendered
+    # by markdown_to_html, as count_nodes counts them: an inline element
+    # around text only is one leaf, other text runs are leaves of their own;
+    # adjacent runs, e.g. around a dropped empty span, count once
+    count = 0
+    # per open element, [ text runs, whether it holds elements ]
+    stack = [ [ 0, True ] ]
+
+    for match in HTML_TOKEN_PATTERN.finditer(html):
+        if match.group(1) is None:
+            stack[-1][0] += 1
+        elif match.group(1) == "/":
+            texts, elements = stack.pop()
+            count += 1 + (texts if elements else 0)
+        else:
+            stack[-1][1] = True
+            stack.append([ 0, match.group(2) in PARENT_TAGS ])
+
+    return count + stack[0][0]
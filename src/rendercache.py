@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# default size bound of a render cache directory
+RENDER_CACHE_SIZE = 256 * 1024 * 1024
+
+class RenderCache():
+    # rendered markdown sources, any json value such as the html and its
+    # links, stored as one file per source under a hash of the converter
+    # version and the source; the directory can be shared by concurrent
+    # builds and copied between machines, e.g. as a CI cache
+    def __init__(self, directory, converter, max_size = RENDER_CACHE_SIZE):
+        self.directory = directory
+        self.converter = converter
+        self.max_size = max_size
+
+    def key(self, source):
+        digest = hashlib.sha256(self.converter.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(source)
+
+        return digest.hexdigest()
+
+    def path(self, key):
+        # two levels keep directories small
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self.path(key)
+
+        try:
+            with open(path, "rb") as f:
+                value = json.loads(f.read())
+        except FileNotFoundError:
+            # missing, or evicted by another build
+            return None
+        except (ValueError, OSError):
+            # truncated or unreadable, e.g. a damaged CI cache; a miss, and
+            # the next put writes the entry again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            return None
+
+        try:
+            # the modification time orders entries for eviction
+            os.utime(path)
+        except OSError:
+            # e.g. a read-only shared cache, the entry is still good
+            pass
+
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        directory = os.path.dirname(path)
+
+        os.makedirs(directory, exist_ok=True)
+
+        # readers only ever see complete files, a concurrent put of the
+        # same key writes the same bytes
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(json.dumps(value, sort_keys=True).encode("utf-8"))
+
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def entries(self):
+        # (mtime_ns, size, path) of every stored entry
+        result = []
+
+        if not os.path.isdir(self.directory):
+            return result
+
+        with os.scandir(self.directory) as prefixes:
+            for prefix in prefixes:
+                if not prefix.is_dir():
+                    continue
+
+                with os.scandir(prefix.path) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".tmp"):
+                            continue
+
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+
+                        result.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        return result
+
+    def evict(self):
+        # removes the least recently used entries until the directory fits
+        # max_size, returns the number removed
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        removed = 0
+
+        entries.sort()
+
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+            removed += 1
+
+        return removed
+
+    def __repr__(self):
+        return f"RenderCache({self.directory}, {self.max_size} bytes)"
@@ -0,0 +1,247 @@
+import functools
+import http.server
+import os
+import sys
+import threading
+from build import (
+        BLOCK_CACHE_SIZE,
+        build_page,
+        build_site,
+        converter_version,
+        hash_file,
+        load_manifest,
+        load_templates,
+        save_manifest,
+        stat_key,
+        template_for
+    )
+from convert import BlockCache
+from watch import ContentScanner
+
+RELOAD_PATH = "/__reload"
+
+# opens a server-sent events stream and reloads the page on every message
+RELOAD_SCRIPT = (f"<script>new EventSource(\"{RELOAD_PATH}\").onmessage = "
+                 "function () { location.reload(); };</script>")
+
+def inject_reload_script(html):
+    index = html.rfind(b"</body>")
+
+    if index == -1:
+        return html + RELOAD_SCRIPT.encode("utf-8")
+
+    return html[:index] + RELOAD_SCRIPT.encode("utf-8") + html[index:]
+
+class SiteWatcher():
+    # keeps public/ in sync with content/ while serving, one page at a time
+    def __init__(self, content_dir, template_path, dest_dir, manifest_path,
+                 block_cache = BLOCK_CACHE_SIZE, notify = True):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.manifest_path = manifest_path
+        self.cache = BlockCache(block_cache) if block_cache > 0 else None
+        # inotify when available, polling otherwise
+        self.notify = notify
+        self.scanner = None
+
+        self.converter = converter_version()
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def start(self):
+        # bring the whole site up to date once, then track single files
+        build_site(self.content_dir, self.template_path, self.dest_dir,
+                   self.manifest_path, self.converter)
+
+        self.load()
+
+    def load(self):
+        manifest = load_manifest(self.manifest_path)
+
+        self.pages = manifest["pages"]
+        self.templates = manifest["templates"]
+        self.template_stat = stat_key(self.template_path)
+        self.overrides, self.compiled = load_templates(self.content_dir, self.template_path)[:2]
+
+        # pages and overrides are tracked from here on, in one walk
+        if self.scanner is None:
+            self.scanner = ContentScanner(self.content_dir, self.notify)
+
+    def close(self):
+        if self.scanner is not None:
+            self.scanner.close()
+
+    def save(self):
+        save_manifest(self.manifest_path, self.converter, self.templates, self.pages)
+
+    def poll(self):
+        # rebuilds what changed since the last poll, returns the pages
+        pages, overrides_changed = self.scanner.update()
+        template_stat = stat_key(self.template_path)
+
+        # build_site rebuilds just the pages of the changed templates
+        if overrides_changed or template_stat != self.template_stat:
+            self.template_stat = template_stat
+
+            result = build_site(self.content_dir, self.template_path, self.dest_dir,
+                                self.manifest_path, self.converter)
+            self.load()
+
+            changed = result.built + result.removed
+        else:
+            changed = self.update_pages(pages)
+
+        if len(changed) > 0:
+            with self.condition:
+                self.generation += 1
+                self.condition.notify_all()
+
+        return changed
+
+    def update_pages(self, pages):
+        # pages is what the scanner saw added, changed or removed
+        changed = []
+
+        for page in pages:
+            source_stat = self.scanner.pages.get(page)
+            entry = self.pages.get(page)
+
+            if source_stat is None:
+                if entry is not None:
+                    self.pages.pop(page)
+                    dest_path = os.path.join(self.dest_dir, entry["output"])
+
+                    if os.path.exists(dest_path):
+                        os.remove(dest_path)
+
+                changed.append(page)
+                continue
+
+            # saved without changes
+            if entry is not None and hash_file(os.path.join(self.content_dir, page)) == entry["source_hash"]:
+                entry["source_stat"] = source_stat
+                continue
+
+            template_path = template_for(page, self.template_path, self.overrides)
+
+            try:
+                self.pages[page] = build_page(page, self.content_dir, self.dest_dir,
+                                              self.compiled[template_path], template_path, self.cache)
+            except Exception as e:
+                # keep the previous output, the page is retried on its next save
+                print(f"build failed: {page}: {e}", file=sys.stderr)
+                continue
+
+            changed.append(page)
+
+        return changed
+
+    def wait(self, generation, timeout):
+        # blocks until a rebuild after generation, returns the current one
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+
+            return self.generation
+
+    def run(self, interval, stop):
+        while not stop.wait(interval):
+            try:
+                changed = self.poll()
+            except Exception as e:
+                # a broken page must not stop the server
+                print(f"build failed: {e}", file=sys.stderr)
+                continue
+
+            for page in changed:
+                print(f"rebuilt {page}")
+
+class PreviewHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, watcher, **kwargs):
+        self.watcher = watcher
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            self.send_reload_events()
+            return
+
+        path = self.translate_path(self.path)
+
+        if os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+
+        if path.endswith(".html") and os.path.isfile(path):
+            self.send_html(path)
+            return
+
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as f:
+            html = inject_reload_script(f.read())
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(html)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(html)
+
+    def send_reload_events(self):
+        # read before answering, a rebuild right after the headers must not be missed
+        generation = self.watcher.generation
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        try:
+            while True:
+                current = self.watcher.wait(generation, 15)
+
+                if current == generation:
+                    # keep idle connections open
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = current
+
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        # only errors, a reload fetches every asset again
+        pass
+
+def make_server(watcher, host, port):
+    handler = functools.partial(PreviewHandler, directory=watcher.dest_dir, watcher=watcher)
+
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+def serve(content_dir, template_path, dest_dir, manifest_path, host = "127.0.0.1", port = 8000,
+          interval = 0.05, block_cache = BLOCK_CACHE_SIZE):
+    watcher = SiteWatcher(content_dir, template_path, dest_dir, manifest_path, block_cache)
+    watcher.start()
+
+    server = make_server(watcher, host, port)
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(interval, stop), daemon=True)
+    thread.start()
+
+    print(f"serving {dest_dir} on http://{host}:{server.server_address[1]}/")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        thread.join()
+        server.server_close()
+        watcher.save()
+        watcher.close()
+
+    return 0
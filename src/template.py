@@ -0,0 +1,45 @@
+import re
+
+# placeholders filled per page, anything else in a template is literal
+SLOT_PATTERN = re.compile(r"\{\{ (Title|Content) \}\}")
+
+class Template():
+    # a page layout split once into literal segments and the slots between
+    # them, segments[i] comes before slots[i]
+    def __init__(self, source):
+        self.segments = []
+        self.slots = []
+
+        start = 0
+
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(source[start:match.start()])
+            self.slots.append(match.group(1))
+            start = match.end()
+
+        self.segments.append(source[start:])
+
+    def iter_parts(self, values):
+        # values maps slot names to text; slot values are not searched for
+        # placeholders
+        yield self.segments[0]
+
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            yield values[slot]
+            yield segment
+
+    def render(self, values):
+        return "".join(self.iter_parts(values))
+
+    def write(self, out, values, digest = None):
+        # streams the encoded page to a binary file, updating digest with
+        # the same bytes
+        for part in self.iter_parts(values):
+            data = part.encode("utf-8")
+            out.write(data)
+
+            if digest is not None:
+                digest.update(data)
+
+    def __repr__(self):
+        return f"Template({self.slots})"
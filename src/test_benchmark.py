@@ -0,0 +1,29 @@
+import unittest
+from benchmark import compare_results
+
+def suite_result(timings):
+    return { "seed": 0, "results": { "links/small": timings } }
+
+class TestBenchmark(unittest.TestCase):
+    def test_compare_results(self):
+        baseline = suite_result({ "to_html": 1.0, "total": 2.0, "bytes": 100 })
+        current = suite_result({ "to_html": 1.05, "total": 2.5, "bytes": 100 })
+
+        result = compare_results(baseline, current, 0.1)
+
+        self.assertListEqual(result,
+            [
+                ("links/small", "to_html", 1.0, 1.05, False),
+                ("links/small", "total", 2.0, 2.5, True)
+            ])
+
+    def test_compare_results_missing(self):
+        baseline = suite_result({ "to_html": 1.0 })
+        current = { "seed": 0, "results": { "code/small": { "to_html": 5.0 } } }
+
+        result = compare_results(baseline, current, 0.1)
+
+        self.assertListEqual(result, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,403 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from profiling import profile
+from build import (
+        find_pages,
+        make_batches,
+        output_path,
+        extract_title,
+        build_site,
+        load_manifest,
+        merge_shards,
+        page_shard,
+        parse_shard,
+        template_for
+    )
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def read_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, "manifest.json")
+
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nsome **text**")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\n* foo\n* bar")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, converter = "test"):
+        return build_site(self.content, self.template, self.dest, self.manifest, converter)
+
+    def test_find_pages(self):
+        write_file(os.path.join(self.content, "notes.txt"), "not markdown")
+
+        result = find_pages(self.content)
+
+        self.assertListEqual(result, [ "blog/post.md", "index.md" ])
+
+    def test_output_path(self):
+        self.assertEqual(output_path("blog/post.md"), "blog/post.html")
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("some text\n\n#  Title \n\n## sub"), "Title")
+        self.assertEqual(extract_title("## sub", "default"), "default")
+
+    def test_build_title_escaped(self):
+        write_file(os.path.join(self.content, "index.md"), "# A <b> & C")
+
+        self.build()
+
+        self.assertTrue(read_file(os.path.join(self.dest, "index.html")).startswith(
+            "<title>A &lt;b&gt; &amp; C</title>"))
+
+    def test_build(self):
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "blog/post.md", "index.md" ])
+        self.assertEqual(read_file(os.path.join(self.dest, "blog", "post.html")),
+            "<title>Post</title><main><div><h1>Post</h1><ul><li>foo</li><li>bar</li></ul></div></main>")
+        self.assertEqual(read_file(os.path.join(self.dest, "index.html")),
+            "<title>Home</title><main><div><h1>Home</h1><p>some <b>text</b></p></div></main>")
+
+    def test_build_unchanged(self):
+        self.build()
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [])
+        self.assertListEqual(result.skipped, [ "blog/post.md", "index.md" ])
+
+    def test_build_source_changed(self):
+        self.build()
+
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nchanged, and longer")
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "index.md" ])
+        self.assertListEqual(result.skipped, [ "blog/post.md" ])
+        self.assertIn("changed, and longer", read_file(os.path.join(self.dest, "index.html")))
+
+    def test_build_source_touched(self):
+        self.build()
+
+        path = os.path.join(self.content, "index.md")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [])
+
+    def test_build_template_changed(self):
+        self.build()
+
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "blog/post.md", "index.md" ])
+
+    def test_build_converter_changed(self):
+        self.build()
+
+        result = self.build("other")
+
+        self.assertListEqual(result.built, [ "blog/post.md", "index.md" ])
+
+    def test_build_output_removed(self):
+        self.build()
+
+        os.remove(os.path.join(self.dest, "index.html"))
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "index.md" ])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_build_source_removed(self):
+        self.build()
+
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+
+        result = self.build()
+
+        self.assertListEqual(result.removed, [ "blog/post.md" ])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+    def test_make_batches(self):
+        pages = [ "a.md", "b.md", "c.md", "d.md" ]
+        sizes = [ 100, 100, 300, 50 ]
+
+        with mock.patch("build.BATCH_BYTES", 200):
+            result = make_batches(pages, sizes, 1)
+
+        self.assertListEqual(result, [ [ "a.md", "b.md" ], [ "c.md" ], [ "d.md" ] ])
+
+    def test_make_batches_small_pages(self):
+        pages = [ "a.md", "b.md", "c.md" ]
+        sizes = [ 100, 100, 100 ]
+
+        result = make_batches(pages, sizes, 4)
+
+        self.assertListEqual(result, [ pages ])
+
+    def test_make_batches_every_worker(self):
+        # 4 MiB on 32 workers, below the old 256 KiB batch floor
+        pages = [ f"{i}.md" for i in range(64) ]
+        sizes = [ 64 * 1024 ] * 64
+
+        result = make_batches(pages, sizes, 32)
+
+        self.assertGreaterEqual(len(result), 32)
+        self.assertListEqual([ page for batch in result for page in batch ], pages)
+
+    def test_make_batches_uneven(self):
+        pages = [ "a.md", "b.md", "c.md", "d.md" ]
+
+        self.assertListEqual(make_batches(pages, [ 100, 100, 100, 100 ], 3),
+                             [ [ "a.md", "b.md" ], [ "c.md" ], [ "d.md" ] ])
+        self.assertListEqual(make_batches(pages, [ 1000, 10, 10, 10 ], 4),
+                             [ [ "a.md" ], [ "b.md" ], [ "c.md" ], [ "d.md" ] ])
+
+    def test_build_parallel(self):
+        for i in range(8):
+            write_file(os.path.join(self.content, "many", f"page{i}.md"), f"# Page {i}\n\ntext *{i}*")
+
+        self.build()
+        expected = {}
+
+        for page in find_pages(self.content):
+            expected[page] = read_file(os.path.join(self.dest, output_path(page)))
+
+        os.remove(self.manifest)
+
+        with mock.patch("build.BATCH_BYTES", 1):
+            result = build_site(self.content, self.template, self.dest, self.manifest, "test", jobs=3)
+
+        self.assertListEqual(result.built, sorted(expected))
+
+        for page in expected:
+            self.assertEqual(read_file(os.path.join(self.dest, output_path(page))), expected[page])
+
+    def test_build_profile(self):
+        for i in range(4):
+            write_file(os.path.join(self.content, "many", f"page{i}.md"), f"# Page {i}")
+
+        with mock.patch("build.BATCH_BYTES", 1):
+            with profile() as stats:
+                build_site(self.content, self.template, self.dest, self.manifest, "test", jobs=2)
+
+        # the same fused path as an unprofiled build
+        self.assertEqual(stats.stages["markdown_to_html"].calls, 6)
+        self.assertEqual(stats.stages["block:heading"].calls, 6)
+        self.assertEqual(stats.stages["block:heading"].nodes, 12)
+        self.assertIn("inline_to_html", stats.stages)
+        self.assertNotIn("markdown_to_html_node", stats.stages)
+
+    def test_template_for(self):
+        overrides = { "blog": "content/blog/template.html", "docs/api": "content/docs/api/template.html" }
+
+        self.assertEqual(template_for("index.md", "default.html", overrides), "default.html")
+        self.assertEqual(template_for("blog/post.md", "default.html", overrides), "content/blog/template.html")
+        self.assertEqual(template_for("blog/2024/post.md", "default.html", overrides), "content/blog/template.html")
+        self.assertEqual(template_for("docs/guide.md", "default.html", overrides), "default.html")
+        self.assertEqual(template_for("docs/api/x.md", "default.html", overrides), "content/docs/api/template.html")
+
+    def test_build_template_override(self):
+        write_file(os.path.join(self.content, "blog", "template.html"), "<article>{{ Content }}</article>")
+
+        self.build()
+
+        self.assertEqual(read_file(os.path.join(self.dest, "blog", "post.html")),
+            "<article><div><h1>Post</h1><ul><li>foo</li><li>bar</li></ul></div></article>")
+        self.assertTrue(read_file(os.path.join(self.dest, "index.html")).startswith("<title>Home</title>"))
+
+    def test_build_template_override_changed(self):
+        write_file(os.path.join(self.content, "blog", "template.html"), "<article>{{ Content }}</article>")
+        self.build()
+
+        write_file(os.path.join(self.content, "blog", "template.html"), "<section>{{ Content }}</section>")
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "blog/post.md" ])
+        self.assertListEqual(result.skipped, [ "index.md" ])
+
+    def test_build_template_override_added(self):
+        self.build()
+
+        write_file(os.path.join(self.content, "blog", "template.html"), "<article>{{ Content }}</article>")
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "blog/post.md" ])
+        self.assertTrue(read_file(os.path.join(self.dest, "blog", "post.html")).startswith("<article>"))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+
+        for text in ("0/4", "5/4", "1/0", "1", "a/b", "-1/4"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_page_shard(self):
+        counts = [ 0, 0, 0, 0 ]
+
+        for i in range(400):
+            counts[page_shard(f"docs/page{i}.md", 4) - 1] += 1
+
+        self.assertEqual(page_shard("docs/page0.md", 4), page_shard("docs/page0.md", 4))
+        self.assertTrue(all(count > 50 for count in counts))
+
+    def build_shards(self, count):
+        shards = []
+
+        for index in range(1, count + 1):
+            dest = os.path.join(self.root, f"shard{index}", "public")
+            manifest = os.path.join(self.root, f"shard{index}.json")
+
+            build_site(self.content, self.template, dest, manifest, "test", shard=(index, count))
+            shards.append((dest, manifest))
+
+        return shards
+
+    def read_tree(self, root):
+        tree = {}
+
+        for directory, names, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                tree[os.path.relpath(path, root)] = read_file(path)
+
+        return tree
+
+    def test_merge_shards(self):
+        for i in range(20):
+            write_file(os.path.join(self.content, "many", f"page{i}.md"), f"# Page {i}\n\ntext *{i}*")
+
+        self.build()
+        expected = self.read_tree(self.dest)
+        expected_pages = load_manifest(self.manifest)["pages"]
+
+        merged_dest = os.path.join(self.root, "merged")
+        merged_manifest = os.path.join(self.root, "merged.json")
+
+        result = merge_shards(self.build_shards(3), merged_dest, merged_manifest)
+
+        self.assertEqual(len(result.built), 22)
+        self.assertDictEqual(self.read_tree(merged_dest), expected)
+        self.assertListEqual(sorted(load_manifest(merged_manifest)["pages"]), sorted(expected_pages))
+
+        # the merged tree is a complete build, nothing to do
+        result = build_site(self.content, self.template, merged_dest, merged_manifest, "test")
+
+        self.assertListEqual(result.built, [])
+
+    def test_merge_shards_incremental(self):
+        merged_dest = os.path.join(self.root, "merged")
+        merged_manifest = os.path.join(self.root, "merged.json")
+
+        merge_shards(self.build_shards(2), merged_dest, merged_manifest)
+
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nchanged, and longer")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+
+        result = merge_shards(self.build_shards(2), merged_dest, merged_manifest)
+
+        self.assertListEqual(result.built, [ "index.md" ])
+        self.assertListEqual(result.removed, [ "blog/post.md" ])
+        self.assertIn("changed, and longer", read_file(os.path.join(merged_dest, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(merged_dest, "blog", "post.html")))
+
+    def test_build_shard_over_full_build(self):
+        for i in range(6):
+            write_file(os.path.join(self.content, "many", f"page{i}.md"), f"# Page {i}")
+
+        self.build()
+        outputs = self.read_tree(self.dest)
+
+        # edited in the other shard
+        self.assertEqual(page_shard("index.md", 2), 2)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nchanged")
+
+        mine = [ page for page in find_pages(self.content) if page_shard(page, 2) == 1 ]
+        theirs = [ page for page in find_pages(self.content) if page_shard(page, 2) == 2 ]
+
+        result = build_site(self.content, self.template, self.dest, self.manifest, "test", shard=(1, 2))
+
+        # the other shard's outputs and manifest entries are left alone
+        self.assertListEqual(result.removed, [])
+        self.assertListEqual(sorted(result.built + result.skipped), mine)
+        self.assertListEqual(sorted(self.read_tree(self.dest)), sorted(outputs))
+        self.assertNotIn("shard", load_manifest(self.manifest))
+        self.assertListEqual(sorted(load_manifest(self.manifest)["pages"]), sorted(mine + theirs))
+
+        result = self.build()
+
+        self.assertListEqual(result.built, [ "index.md" ])
+
+    def test_build_shard_removed_page(self):
+        self.build()
+
+        self.assertEqual(page_shard("blog/post.md", 2), 1)
+        self.assertEqual(page_shard("index.md", 2), 2)
+
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        os.remove(os.path.join(self.content, "index.md"))
+
+        # only the deleted page of this shard is removed
+        result = build_site(self.content, self.template, self.dest, self.manifest, "test", shard=(1, 2))
+
+        self.assertListEqual(result.removed, [ "blog/post.md" ])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+        result = self.build()
+
+        self.assertListEqual(result.removed, [ "index.md" ])
+
+    def test_build_shard_other_shard_manifest(self):
+        build_site(self.content, self.template, self.dest, self.manifest, "test", shard=(1, 2))
+        result = build_site(self.content, self.template, self.dest, self.manifest, "test", shard=(2, 2))
+
+        # started fresh, the first shard's outputs are not touched
+        self.assertListEqual(result.removed, [])
+        self.assertListEqual(sorted(result.built), [ page for page in find_pages(self.content)
+                                                     if page_shard(page, 2) == 2 ])
+        self.assertListEqual(load_manifest(self.manifest)["shard"], [ 2, 2 ])
+
+        for page in find_pages(self.content):
+            self.assertTrue(os.path.exists(os.path.join(self.dest, output_path(page))))
+
+    def test_merge_shards_missing(self):
+        shards = self.build_shards(3)
+
+        with self.assertRaises(Exception):
+            merge_shards(shards[:2], self.dest, self.manifest)
+
+        with self.assertRaises(Exception):
+            merge_shards(shards + shards[:1], self.dest, self.manifest)
+
+if __name__ == "__main__":
+    unittest.main()
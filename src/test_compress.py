@@ -0,0 +1,160 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+from compress import compress_site, find_outputs
+from test_build import write_file
+
+PAGE = "<p>" + "compressible text " * 50 + "</p>"
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, "compress.json")
+
+        write_file(os.path.join(self.dest, "index.html"), PAGE)
+        write_file(os.path.join(self.dest, "styles.css"), "body { margin: 0; }" * 20)
+        write_file(os.path.join(self.dest, "blog", "post.html"), PAGE)
+        write_file(os.path.join(self.dest, "small.html"), "<p>hi</p>")
+        write_file(os.path.join(self.dest, "image.png"), "not text")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def compress(self, **kwargs):
+        # brotli is optional, the tests only rely on gzip
+        with mock.patch("compress.brotli", None):
+            return compress_site(self.dest, self.manifest, **kwargs)
+
+    def test_find_outputs(self):
+        result = find_outputs(self.dest)
+
+        self.assertListEqual(result, [ "blog/post.html", "index.html", "small.html", "styles.css" ])
+
+    def test_compress(self):
+        result = self.compress()
+
+        self.assertListEqual(result.compressed, [ "blog/post.html", "index.html", "small.html", "styles.css" ])
+
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), PAGE)
+
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "styles.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "image.png.gz")))
+
+    def test_compress_deterministic(self):
+        self.compress()
+
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            first = f.read()
+
+        with open(os.path.join(self.dest, "blog", "post.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_compress_unchanged(self):
+        self.compress()
+
+        # rewritten with the same content
+        write_file(os.path.join(self.dest, "index.html"), PAGE)
+
+        result = self.compress()
+
+        self.assertListEqual(result.compressed, [])
+        self.assertEqual(len(result.skipped), 4)
+
+    def test_compress_changed(self):
+        self.compress()
+
+        write_file(os.path.join(self.dest, "index.html"), PAGE + "changed")
+
+        result = self.compress()
+
+        self.assertListEqual(result.compressed, [ "index.html" ])
+
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), PAGE + "changed")
+
+    def test_compress_sibling_deleted(self):
+        self.compress()
+
+        os.remove(os.path.join(self.dest, "styles.css.gz"))
+
+        result = self.compress()
+
+        self.assertListEqual(result.compressed, [ "styles.css" ])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "styles.css.gz")))
+
+    def test_compress_settings_changed(self):
+        self.compress()
+
+        result = self.compress(gzip_level=1)
+
+        self.assertEqual(len(result.compressed), 4)
+
+    def test_compress_min_size(self):
+        self.compress()
+
+        result = self.compress(min_size=1)
+
+        self.assertEqual(len(result.compressed), 4)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "small.html.gz")))
+
+    def test_compress_replaces_siblings(self):
+        self.compress()
+
+        path = os.path.join(self.dest, "index.html.gz")
+        inode = os.stat(path).st_ino
+
+        write_file(os.path.join(self.dest, "index.html"), PAGE + "changed")
+
+        # the sibling is never removed, only renamed over
+        with mock.patch("compress.os.remove", side_effect=AssertionError):
+            self.compress()
+
+        self.assertNotEqual(os.stat(path).st_ino, inode)
+        self.assertListEqual(sorted(os.listdir(self.dest)), [
+            "blog", "image.png", "index.html", "index.html.gz", "small.html",
+            "styles.css", "styles.css.gz",
+        ])
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), PAGE + "changed")
+
+    def test_compress_shrunk_below_min_size(self):
+        self.compress()
+
+        write_file(os.path.join(self.dest, "index.html"), "<p>hi</p>")
+
+        result = self.compress()
+
+        self.assertListEqual(result.compressed, [ "index.html" ])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+
+    def test_compress_output_removed(self):
+        self.compress()
+
+        os.remove(os.path.join(self.dest, "index.html"))
+
+        result = self.compress()
+
+        self.assertListEqual(result.removed, [ "index.html" ])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+
+    def test_compress_parallel(self):
+        for i in range(6):
+            write_file(os.path.join(self.dest, "many", f"page{i}.html"), PAGE + str(i))
+
+        result = self.compress(jobs=2)
+
+        self.assertEqual(len(result.compressed), 10)
+
+        with gzip.open(os.path.join(self.dest, "many", "page5.html.gz"), "rt", encoding="utf-8") as f:
+            self.assertEqual(f.read(), PAGE + "5")
+
+if __name__ == "__main__":
+    unittest.main()
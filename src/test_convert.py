@@ -1,6 +1,12 @@
+import io
+import random
+import sys
 import unittest
+from unittest import mock
+import convert
 from convert import (
         text_node_to_html_node,
+        text_nodes_to_html_nodes,
         split_nodes_delimiter,
         extract_markdown_images,
         extract_markdown_links,
@@ -16,11 +22,18 @@ from convert import (
         code_to_html_node,
         heading_to_html_node,
         paragraph_to_html_node,
-        markdown_to_html_node
+        markdown_to_html_node,
+        BlockCache,
+        iter_markdown_blocks,
+        iter_markdown_to_html_nodes,
+        write_markdown_to_html,
+        markdown_to_html,
+        inline_to_html
     )
+from corpus import CORPUS_KINDS, generate_page
 from leafnode import LeafNode
 from parentnode import ParentNode
-from textnode import TextNode, TextType
+from textnode import NestedTextNode, TextNode, TextSpan, TextType
 
 class TestConvert(unittest.TestCase):
     def test_normal(self):
@@ -371,6 +384,27 @@ class TestConvert(unittest.TestCase):
                 TextNode("simple bold", TextType.BOLD)
             ])
 
+    def test_split_nodes_link_after_same_image(self):
+        node = TextNode("![a](b.png) and [a](b.png)", TextType.NORMAL)
+
+        result = split_nodes_link([node])
+
+        self.assertListEqual(result,
+            [
+                TextNode("![a](b.png) and ", TextType.NORMAL),
+                TextNode("a", TextType.LINK, "b.png")
+            ])
+
+    def test_split_nodes_link_many(self):
+        text = "".join(f"[{i}](page{i}.html) " for i in range(1000))
+        node = TextNode(text, TextType.NORMAL)
+
+        result = split_nodes_link([node])
+
+        self.assertEqual(len(result), 2000)
+        self.assertEqual(result[1998], TextNode("999", TextType.LINK, "page999.html"))
+        self.assertEqual(result[1999], TextNode(" ", TextType.NORMAL))
+
     def test_text_to_textnodes(self):
         text = "This is **text** with an *italic* word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
 
@@ -390,6 +424,168 @@ class TestConvert(unittest.TestCase):
                 TextNode("link", TextType.LINK, "https://boot.dev"),
             ])
 
+    def test_text_to_textnodes_bold_in_italic(self):
+        text = "*italic **bold** italic* text"
+
+        result = text_to_textnodes(text)
+
+        self.assertListEqual(result,
+            [
+                TextNode("italic bold italic", TextType.ITALIC, None,
+                    [
+                        TextNode("italic ", TextType.NORMAL),
+                        TextNode("bold", TextType.BOLD),
+                        TextNode(" italic", TextType.NORMAL)
+                    ]),
+                TextNode(" text", TextType.NORMAL),
+            ])
+
+    def test_text_to_textnodes_bold_and_italic_shared_delimiter(self):
+        text = "***both*** and **bold *italic***"
+
+        result = text_to_textnodes(text)
+
+        self.assertListEqual(result,
+            [
+                TextNode("both", TextType.BOLD, None,
+                    [
+                        TextNode("both", TextType.ITALIC)
+                    ]),
+                TextNode(" and ", TextType.NORMAL),
+                TextNode("bold italic", TextType.BOLD, None,
+                    [
+                        TextNode("bold ", TextType.NORMAL),
+                        TextNode("italic", TextType.ITALIC)
+                    ]),
+            ])
+
+    def test_text_to_textnodes_code_is_literal(self):
+        text = "a `**not bold** * [x](y)` b"
+
+        result = text_to_textnodes(text)
+
+        self.assertListEqual(result,
+            [
+                TextNode("a ", TextType.NORMAL),
+                TextNode("**not bold** * [x](y)", TextType.CODE),
+                TextNode(" b", TextType.NORMAL),
+            ])
+
+    def test_text_to_textnodes_link_in_bold(self):
+        text = "**see [link](example.com)**"
+
+        result = text_to_textnodes(text)
+
+        self.assertListEqual(result,
+            [
+                TextNode("see link", TextType.BOLD, None,
+                    [
+                        TextNode("see ", TextType.NORMAL),
+                        TextNode("link", TextType.LINK, "example.com")
+                    ]),
+            ])
+
+    def test_text_to_textnodes_unclosed_italic_in_bold(self):
+        result = text_to_textnodes("**2*3 is 6**")
+
+        self.assertListEqual(result, [ TextNode("2*3 is 6", TextType.BOLD) ])
+        self.assertEqual(inline_to_html("**2*3 is 6**"), "<b>2*3 is 6</b>")
+
+    def test_text_to_textnodes_unclosed_code_in_italic(self):
+        result = text_to_textnodes("*a `b* c")
+
+        self.assertListEqual(result,
+            [
+                TextNode("a `b", TextType.ITALIC),
+                TextNode(" c", TextType.NORMAL),
+            ])
+        self.assertEqual(inline_to_html("*a `b* c"), "<i>a `b</i> c")
+
+    def test_text_to_textnodes_run_closes_outer_span(self):
+        # "***" cannot close both spans here, the last "*" opens a new one
+        text = "**a*b***c* [x](y)"
+        references = []
+
+        result = text_to_textnodes(text)
+
+        self.assertListEqual(result,
+            [
+                TextNode("a*b", TextType.BOLD),
+                TextNode("c", TextType.ITALIC),
+                TextNode(" ", TextType.NORMAL),
+                TextNode("x", TextType.LINK, "y"),
+            ])
+        self.assertEqual(inline_to_html(text, references), "<b>a*b</b><i>c</i> <a href=\"y\">x</a>")
+        self.assertListEqual(references, [ ("a", "y") ])
+
+    def test_text_to_textnodes_spans(self):
+        text = "a **b *c* d** " + "x" * 300 + " [l](u) tail"
+
+        result = text_to_textnodes(text)
+
+        self.assertIsInstance(result[1], NestedTextNode)
+        self.assertIsInstance(result[1].children[1], TextSpan)
+        self.assertIs(result[1].children[1].source, text)
+
+        # long runs are spans, short ones past the small ints are strings
+        self.assertIsInstance(result[2], TextSpan)
+        self.assertIs(type(result[4]), TextNode)
+        self.assertEqual(result[4].text, " tail")
+        self.assertEqual("".join(node.text for node in result), "a b c d " + "x" * 300 + " l tail")
+
+    def test_text_to_textnodes_rescan_only_after_run(self):
+        with mock.patch("convert.scan_spans", wraps=convert.scan_spans) as scan_spans:
+            self.assertRaises(Exception, text_to_textnodes, "some **bold")
+            self.assertEqual(scan_spans.call_count, 1)
+
+            text_to_textnodes("**a*b***c*")
+            self.assertEqual(scan_spans.call_count, 3)
+
+        # any other failure is not read as the other reading of a run
+        with mock.patch("convert.find_literal_close", side_effect=KeyError):
+            self.assertRaises(KeyError, text_to_textnodes, "**a*b***`c`*")
+            self.assertRaises(KeyError, inline_to_html, "**a*b***`c`*")
+
+    def test_text_to_textnodes_no_closing_delimiter(self):
+        self.assertRaises(Exception, text_to_textnodes, "some **bold")
+        self.assertRaises(Exception, text_to_textnodes, "some *italic **bold* text**")
+        self.assertRaises(Exception, text_to_textnodes, "some `code")
+
+    def test_text_to_textnodes_empty(self):
+        self.assertListEqual(text_to_textnodes(""), [])
+        self.assertListEqual(text_to_textnodes("****"), [])
+
+    def test_nested_text_node_to_html_node(self):
+        node = TextNode("italic bold", TextType.ITALIC, None,
+            [
+                TextNode("italic ", TextType.NORMAL),
+                TextNode("bold", TextType.BOLD)
+            ])
+
+        result = text_node_to_html_node(node)
+
+        self.assertEqual(isinstance(result, ParentNode), True)
+        self.assertEqual(result.to_html(),
+                         "<i>italic <b>bold</b></i>")
+
+    def test_text_node_invalid_type(self):
+        node = TextNode("text", "unknown")
+
+        self.assertRaises(Exception, text_node_to_html_node, node)
+        self.assertRaises(Exception, text_nodes_to_html_nodes, [ node ])
+
+    def test_text_nodes_to_html_nodes(self):
+        nodes = text_to_textnodes("a <b> **bold *x*** `code` [link](/a?b&c) ![alt \"x\"](/i.png) *it*")
+
+        result = text_nodes_to_html_nodes(nodes)
+
+        self.assertListEqual([ node.to_html() for node in result ],
+                             [ text_node_to_html_node(node).to_html() for node in nodes ])
+        self.assertEqual("".join(node.to_html() for node in result),
+                         "a &lt;b&gt; <b>bold <i>x</i></b> <code>code</code> <a href=\"/a?b&amp;c\">link</a> "
+                         "<img src=\"/i.png\" alt=\"alt &quot;x&quot;\"></img> <i>it</i>")
+        self.assertListEqual(text_nodes_to_html_nodes([]), [])
+
     def test_markdown_to_blocks(self):
         text = """
   # This is a heading
@@ -572,6 +768,24 @@ rab
 
         self.assertEqual(result, "paragraph")
 
+    def test_block_to_block_type_trailing_line(self):
+        self.assertEqual(block_to_block_type(">quote\n>quote\n"), "paragraph")
+        self.assertEqual(block_to_block_type("* item\n* item\n"), "paragraph")
+        self.assertEqual(block_to_block_type("1. item\n2. item\n"), "paragraph")
+
+    def test_block_to_block_type_no_space(self):
+        self.assertEqual(block_to_block_type("#heading"), "paragraph")
+        self.assertEqual(block_to_block_type("* item\n*item"), "paragraph")
+        self.assertEqual(block_to_block_type("1.item"), "paragraph")
+
+    def test_block_to_block_type_ordered_list_not_first(self):
+        text = """2. item
+3. foo"""
+
+        result = block_to_block_type(text)
+
+        self.assertEqual(result, "paragraph")
+
     def test_text_to_children_normal(self):
         text = "sample text"
 
@@ -689,6 +903,30 @@ int main() {
         self.assertEqual(result.to_html(),
             "<pre><code>\nint main() {\n  return 0;\n}\n</code></pre>")
 
+    def test_code_to_html_node_is_literal(self):
+        text = "```\nx = a * b\nprint(`x`) if x < 1 & **y**\n```"
+        result = code_to_html_node(text)
+
+        self.assertEqual(result.to_html(),
+            "<pre><code>\nx = a * b\nprint(`x`) if x &lt; 1 &amp; **y**\n</code></pre>")
+
+    def test_code_to_html_node_language(self):
+        text = "```python title=\"x\"\nprint(1)\n```"
+        result = code_to_html_node(text)
+
+        self.assertEqual(result.to_html(),
+            "<pre><code class=\"language-python\">\nprint(1)\n</code></pre>")
+
+    def test_code_to_html_node_language_escaped(self):
+        result = code_to_html_node("```a\"b\nx\n```")
+
+        self.assertEqual(result.to_html(), "<pre><code class=\"language-a&quot;b\">\nx\n</code></pre>")
+
+    def test_code_to_html_node_single_line(self):
+        result = code_to_html_node("```print(1)```")
+
+        self.assertEqual(result.to_html(), "<pre><code>print(1)</code></pre>")
+
     def test_heading_to_html_node(self):
         text = "### heading"
 
@@ -745,6 +983,269 @@ and an image <img src=\"foo.png\" alt=\"alt\"></img>\
 <ol><li>fizz</li><li>buzz</li><li>fizzbuzz</li></ol>\
 </div>")
 
+    def test_markdown_to_html_node_cache(self):
+        text = """# heading
+
+some **footer** text
+
+other text
+
+some **footer** text"""
+
+        cache = BlockCache()
+
+        result = markdown_to_html_node(text, cache)
+
+        self.assertEqual(result.to_html(), markdown_to_html_node(text).to_html())
+        self.assertIs(result.children[1], result.children[3])
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(len(cache), 3)
+
+        markdown_to_html_node(text, cache)
+
+        self.assertEqual(cache.hits, 5)
+        self.assertEqual(cache.misses, 3)
+
+    def test_block_cache_eviction(self):
+        cache = BlockCache(2)
+
+        cache.put("a", "paragraph", "node a")
+        cache.put("b", "paragraph", "node b")
+
+        # a becomes the most recently used
+        self.assertEqual(cache.get("a"), ("paragraph", "node a"))
+
+        cache.put("c", "paragraph", "node c")
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), ("paragraph", "node a"))
+        self.assertEqual(cache.get("c"), ("paragraph", "node c"))
+
+    def test_block_cache_disabled(self):
+        cache = BlockCache(0)
+
+        cache.put("a", "paragraph", "node a")
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get("a"), None)
+
+    def test_iter_markdown_blocks_file(self):
+        text = """  # This is a heading
+
+This is a paragraph of text.
+It has two lines.
+
+
+
+* This is the first list item in a list block
+* This is a list item
+"""
+
+        result = list(iter_markdown_blocks(io.StringIO(text)))
+
+        self.assertListEqual(result, markdown_to_blocks(text))
+        self.assertListEqual(result,
+            [
+                '# This is a heading',
+                'This is a paragraph of text.\nIt has two lines.',
+                '* This is the first list item in a list block\n* This is a list item'
+            ])
+
+    def test_iter_markdown_blocks_lazy(self):
+        read = []
+
+        def lines():
+            for line in [ "first\n", "\n", "second\n", "\n", "third\n" ]:
+                read.append(line)
+                yield line
+
+        blocks = iter_markdown_blocks(lines())
+
+        self.assertEqual(next(blocks), "first")
+        self.assertListEqual(read, [ "first\n", "\n" ])
+
+    def test_iter_markdown_to_html_nodes(self):
+        text = "# heading\n\nsome *text*\n"
+
+        result = list(iter_markdown_to_html_nodes(io.StringIO(text)))
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[0].to_html(), "<h1>heading</h1>")
+        self.assertEqual(result[1].to_html(), "<p>some <i>text</i></p>")
+
+    def test_write_markdown_to_html(self):
+        text = """### heading
+
+Sample text with **bold** and *italic*
+
+>quote
+>end
+
+1. fizz
+2. buzz"""
+
+        out = io.StringIO()
+
+        write_markdown_to_html(io.StringIO(text), out)
+
+        self.assertEqual(out.getvalue(), markdown_to_html_node(text).to_html())
+
+def convert_or_error(func, text):
+    # html, or the exception a conversion raised, for comparing failures
+    try:
+        return func(text)
+    except Exception as e:
+        return (type(e), str(e))
+
+def node_path_to_html(markdown):
+    return markdown_to_html_node(markdown).to_html()
+
+def node_path_inline_to_html(text):
+    return "".join(child.to_html() for child in text_to_children(text))
+
+def collect_references(node, references):
+    # the ("a", href) and ("img", src) pairs of a converted tree, in
+    # document order, as markdown_to_html records them
+    pending = [ node ]
+
+    while len(pending) > 0:
+        node = pending.pop()
+
+        if node.children is not None:
+            pending.extend(reversed(node.children))
+        elif node.tag == "a":
+            references.append(("a", node.props["href"]))
+        elif node.tag == "img":
+            references.append(("img", node.props["src"]))
+
+class TestMarkdownToHtml(unittest.TestCase):
+    # differential tests, the fused path must match the node path byte for
+    # byte, including which inputs fail and how
+    def assertSameHtml(self, markdown):
+        self.assertEqual(convert_or_error(markdown_to_html, markdown),
+                         convert_or_error(node_path_to_html, markdown), markdown)
+
+    def assertSameInlineHtml(self, text):
+        self.assertEqual(convert_or_error(inline_to_html, text),
+                         convert_or_error(node_path_inline_to_html, text), text)
+
+    def test_markdown_to_html(self):
+        text = "# Title\n\nsome **bold *and italic***, `code` and [a link](/x)\n\n```python\nx = 1 < 2\n```"
+
+        self.assertEqual(markdown_to_html(text),
+            "<div><h1>Title</h1><p>some <b>bold <i>and italic</i></b>, <code>code</code> and "
+            "<a href=\"/x\">a link</a></p><pre><code class=\"language-python\">\nx = 1 &lt; 2\n</code></pre></div>")
+
+    def test_markdown_to_html_escaped(self):
+        text = "a < b & *c > d* `<br>` [x & \"y\"](/q?a=1&b=\"2\") ![it's](/i.png?a&b)"
+        expected = ("<div><p>a &lt; b &amp; <i>c &gt; d</i> <code>&lt;br&gt;</code> "
+                    "<a href=\"/q?a=1&amp;b=&quot;2&quot;\">x &amp; \"y\"</a> "
+                    "<img src=\"/i.png?a&amp;b\" alt=\"it&#x27;s\"></img></p></div>")
+
+        self.assertEqual(markdown_to_html(text), expected)
+        self.assertEqual(markdown_to_html_node(text).to_html(), expected)
+
+    def test_markdown_to_html_cache(self):
+        text = "same\n\nsame\n\n*other*"
+        cache = BlockCache()
+
+        self.assertEqual(markdown_to_html(text, cache), markdown_to_html(text))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.get("same")[1], ("<p>same</p>", []))
+
+    def test_markdown_to_html_references(self):
+        text = "[a](/a.html) ![b](b.png)\n\n* [c](https://c.example)\n\n[a](/a.html)"
+        expected = [ ("a", "/a.html"), ("img", "b.png"), ("a", "https://c.example"), ("a", "/a.html") ]
+
+        references = []
+        markdown_to_html(text, None, references)
+
+        self.assertListEqual(references, expected)
+
+        node_references = []
+        collect_references(markdown_to_html_node(text), node_references)
+
+        self.assertListEqual(node_references, expected)
+
+    def test_markdown_to_html_references_cache(self):
+        text = "[a](/a.html)\n\n[a](/a.html)\n\nno links"
+        cache = BlockCache()
+
+        markdown_to_html(text, cache)
+
+        references = []
+        markdown_to_html(text, cache, references)
+
+        self.assertListEqual(references, [ ("a", "/a.html"), ("a", "/a.html") ])
+
+    def test_existing_tests(self):
+        # every document, block and inline text the TestConvert cases
+        # convert, recorded while they run
+        markdowns = []
+        texts = []
+
+        def record(func, inputs):
+            def recorded(text, *args):
+                inputs.append(text)
+                return func(text, *args)
+
+            return recorded
+
+        module = sys.modules[__name__]
+
+        with mock.patch.multiple(module,
+                markdown_to_html_node=record(markdown_to_html_node, markdowns),
+                markdown_to_blocks=record(markdown_to_blocks, markdowns),
+                block_to_block_type=record(block_to_block_type, markdowns),
+                quote_block_to_html_node=record(quote_block_to_html_node, markdowns),
+                unordered_list_to_html_node=record(unordered_list_to_html_node, markdowns),
+                ordered_list_to_html_node=record(ordered_list_to_html_node, markdowns),
+                code_to_html_node=record(code_to_html_node, markdowns),
+                heading_to_html_node=record(heading_to_html_node, markdowns),
+                paragraph_to_html_node=record(paragraph_to_html_node, markdowns),
+                text_to_textnodes=record(text_to_textnodes, texts),
+                text_to_children=record(text_to_children, texts)):
+            result = unittest.TestResult()
+            unittest.defaultTestLoader.loadTestsFromTestCase(TestConvert).run(result)
+
+        self.assertTrue(result.wasSuccessful())
+        self.assertGreater(len(markdowns), 10)
+        self.assertGreater(len(texts), 10)
+
+        for markdown in markdowns:
+            self.assertSameHtml(markdown)
+
+        for text in texts:
+            self.assertSameInlineHtml(text)
+
+    def test_corpus(self):
+        for kind in CORPUS_KINDS:
+            for seed in range(3):
+                text = generate_page(kind, 50, seed)
+                self.assertSameHtml(text)
+
+                references = []
+                node_references = []
+                markdown_to_html(text, None, references)
+                collect_references(markdown_to_html_node(text), node_references)
+
+                self.assertListEqual(references, node_references)
+
+    def test_random(self):
+        # short random documents from the characters markdown cares about,
+        # most of them invalid
+        rng = random.Random(16)
+        alphabet = [ "*", "**", "`", "![", "[", "](", ")", "]", "a", "b c", "\n", "\n\n",
+                     "# ", "> ", "- ", "1. ", "```", "<", "&", "\"", "'" ]
+
+        for _ in range(3000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 20)))
+
+            self.assertSameHtml(text)
+            self.assertSameInlineHtml(text)
+
 if __name__ == "__main__":
     unittest.main()
 
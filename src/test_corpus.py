@@ -0,0 +1,25 @@
+import unittest
+from convert import markdown_to_html_node
+from corpus import CORPUS_KINDS, generate_corpus, generate_page
+
+class TestCorpus(unittest.TestCase):
+    def test_generate_page_seeded(self):
+        for kind in CORPUS_KINDS:
+            self.assertEqual(generate_page(kind, 20, 1), generate_page(kind, 20, 1))
+            self.assertNotEqual(generate_page(kind, 20, 1), generate_page(kind, 20, 2))
+
+    def test_generate_page_blocks(self):
+        page = generate_page("lists", 10)
+
+        self.assertEqual(len(page.split("\n\n")), 10)
+
+    def test_generate_corpus(self):
+        corpus = generate_corpus(sizes = { "tiny": 5 })
+
+        self.assertListEqual(list(corpus), [ f"{kind}/tiny" for kind in CORPUS_KINDS ])
+
+        for text in corpus.values():
+            markdown_to_html_node(text).to_html()
+
+if __name__ == "__main__":
+    unittest.main()
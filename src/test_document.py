@@ -0,0 +1,72 @@
+import unittest
+from convert import markdown_to_html_node
+from document import Document
+
+class TestDocument(unittest.TestCase):
+    def assertMatchesFull(self, document, markdown):
+        self.assertEqual(document.to_html(), markdown_to_html_node(markdown).to_html())
+        self.assertEqual(document.node.to_html(), document.to_html())
+
+    def test_document(self):
+        markdown = "# Title\n\nsome **text**\n\n* foo\n* bar"
+        document = Document(markdown)
+
+        self.assertListEqual(document.blocks, [ "# Title", "some **text**", "* foo\n* bar" ])
+        self.assertMatchesFull(document, markdown)
+
+    def test_update_middle(self):
+        document = Document("# Title\n\nfirst\n\nsecond\n\nthird")
+        children = list(document.node.children)
+
+        result = document.update("# Title\n\nfirst\n\n*changed*\n\nthird")
+
+        self.assertEqual(result, (2, 3, [ "<p><i>changed</i></p>" ]))
+        self.assertIs(document.node.children[1], children[1])
+        self.assertIs(document.node.children[3], children[3])
+        self.assertMatchesFull(document, "# Title\n\nfirst\n\n*changed*\n\nthird")
+
+    def test_update_insert(self):
+        document = Document("first\n\nthird")
+
+        result = document.update("first\n\nsecond\n\nthird")
+
+        self.assertEqual(result, (1, 1, [ "<p>second</p>" ]))
+        self.assertMatchesFull(document, "first\n\nsecond\n\nthird")
+
+    def test_update_remove(self):
+        document = Document("first\n\nsecond\n\nthird")
+
+        result = document.update("first\n\nthird")
+
+        self.assertEqual(result, (1, 2, []))
+        self.assertMatchesFull(document, "first\n\nthird")
+
+    def test_update_repeated_block(self):
+        document = Document("same\n\nsame")
+
+        result = document.update("same\n\nsame\n\nsame")
+
+        self.assertEqual(result, (2, 2, [ "<p>same</p>" ]))
+        self.assertMatchesFull(document, "same\n\nsame\n\nsame")
+
+    def test_update_unchanged(self):
+        document = Document("first\n\nsecond")
+
+        self.assertEqual(document.update("first\n\n\n\nsecond\n"), (2, 2, []))
+
+    def test_update_empty(self):
+        document = Document("first")
+
+        self.assertEqual(document.update(""), (0, 1, []))
+        self.assertEqual(document.to_html(), "<div></div>")
+
+    def test_update_invalid(self):
+        document = Document("first\n\nsecond")
+
+        with self.assertRaises(Exception):
+            document.update("first\n\n**unclosed")
+
+        self.assertMatchesFull(document, "first\n\nsecond")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import unittest
+from convert import markdown_to_html_node
+from corpus import CORPUS_KINDS, generate_page
+from flattree import NONE, FlatTree
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+class TestFlatTree(unittest.TestCase):
+    def tree(self):
+        return ParentNode("div", [
+            ParentNode("p", [
+                LeafNode(None, "some "),
+                LeafNode("b", "bold"),
+                LeafNode("a", "link", { "href": "/a?b&c" }),
+            ]),
+            ParentNode("ul", []),
+            LeafNode("b", "bold"),
+        ], { "class": "page" })
+
+    def test_arrays(self):
+        flat = FlatTree(self.tree())
+
+        self.assertEqual(len(flat), 7)
+        self.assertListEqual(flat.tags, [ "div", "p", None, "b", "a", "ul" ])
+        self.assertListEqual(list(flat.parent), [ NONE, 0, 1, 1, 1, 0, 0 ])
+        self.assertListEqual(list(flat.first_child), [ 1, 2, NONE, NONE, NONE, NONE, NONE ])
+        self.assertListEqual(list(flat.next_sibling), [ NONE, 5, 3, 4, NONE, 6, NONE ])
+        self.assertListEqual(flat.children(0), [ 1, 5, 6 ])
+
+    def test_text_interned(self):
+        flat = FlatTree(self.tree())
+
+        # the second "bold" shares the first one's slice
+        self.assertEqual(flat.text, "some boldlink")
+        self.assertEqual(flat.text_offset[6], flat.text_offset[3])
+        self.assertEqual(flat.value(6), "bold")
+        self.assertIsNone(flat.value(0))
+
+    def test_props(self):
+        flat = FlatTree(self.tree())
+
+        self.assertEqual(flat.props_html(0), " class=\"page\"")
+        self.assertEqual(flat.props_html(4), " href=\"/a?b&amp;c\"")
+        self.assertEqual(flat.props_html(1), "")
+
+    def test_to_html(self):
+        tree = self.tree()
+        flat = FlatTree(tree)
+
+        self.assertEqual(flat.to_html(), tree.to_html())
+        self.assertEqual(flat.to_html(1), tree.children[0].to_html())
+        self.assertEqual(flat.to_html(5), "<ul></ul>")
+        self.assertEqual(flat.to_html(4), "<a href=\"/a?b&amp;c\">link</a>")
+
+    def test_write_html(self):
+        tree = self.tree()
+        out = io.StringIO()
+
+        FlatTree(tree).write_html(out)
+
+        self.assertEqual(out.getvalue(), tree.to_html())
+
+    def test_leaf_root(self):
+        flat = FlatTree(LeafNode("b", "bold"))
+
+        self.assertEqual(flat.to_html(), "<b>bold</b>")
+        self.assertEqual(flat.to_html_node().to_html(), "<b>bold</b>")
+
+    def test_to_html_node(self):
+        tree = self.tree()
+        result = FlatTree(tree).to_html_node()
+
+        self.assertIsInstance(result, ParentNode)
+        self.assertIsInstance(result.children[0].children[2], LeafNode)
+        self.assertEqual(result.props, { "class": "page" })
+        self.assertEqual(result.to_html(), tree.to_html())
+        self.assertEqual(repr(result), repr(tree))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, FlatTree, ParentNode(None, []))
+        self.assertRaises(ValueError, FlatTree, ParentNode("p", [ LeafNode("b", None) ]))
+
+    def test_deep(self):
+        tree = LeafNode(None, "text")
+
+        for _ in range(5000):
+            tree = ParentNode("i", [ tree ])
+
+        flat = FlatTree(tree)
+
+        self.assertEqual(flat.to_html(), tree.to_html())
+        self.assertEqual(flat.to_html_node().to_html(), tree.to_html())
+
+    def test_corpus(self):
+        for kind in CORPUS_KINDS:
+            tree = markdown_to_html_node(generate_page(kind, 50))
+            flat = FlatTree(tree)
+
+            self.assertEqual(flat.to_html(), tree.to_html())
+            self.assertEqual(FlatTree(flat.to_html_node()).to_html(), tree.to_html())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import html
 import unittest
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, escape_attribute, escape_text
 
 class TestHTMLNode(unittest.TestCase):
     def test_ctor_none(self):
@@ -48,6 +49,48 @@ class TestHTMLNode(unittest.TestCase):
 
         self.assertEqual(result, " id=\"foo\" name=\"bar\"")
 
+    def test_props_immutable(self):
+        props = { "id": "foo" }
+
+        node = HTMLNode(props = props)
+
+        props["id"] = "bar"
+
+        with self.assertRaises(TypeError):
+            node.props["name"] = "bar"
+
+        self.assertEqual(node.props, { "id": "foo" })
+        self.assertEqual(node.props_to_html(), " id=\"foo\"")
+
+    def test_props_to_html_escaped(self):
+        node = HTMLNode(props = { "href": "/a?x=1&y=\"2\"", "alt": "it's <b>" })
+
+        self.assertEqual(node.props_to_html(),
+            " href=\"/a?x=1&amp;y=&quot;2&quot;\" alt=\"it&#x27;s &lt;b&gt;\"")
+
+    def test_props_to_html_updated(self):
+        node = HTMLNode(props = { "id": "foo" })
+        node.props = { "id": "bar" }
+
+        self.assertEqual(node.props_to_html(), " id=\"bar\"")
+
+        node.props = None
+
+        self.assertEqual(node.props_to_html(), "")
+
+    def test_escape_text(self):
+        self.assertEqual(escape_text("a < b && c > \"d\""), "a &lt; b &amp;&amp; c &gt; \"d\"")
+        self.assertEqual(escape_text("plain"), "plain")
+
+    def test_escape_attribute(self):
+        for value in ("plain", "a < b && c > \"d\" 'e'", "&amp;"):
+            self.assertEqual(escape_attribute(value), html.escape(value))
+
+    def test_slots(self):
+        node = HTMLNode()
+
+        self.assertRaises(AttributeError, setattr, node, "foo", "bar")
+
     def test_repr(self):
         tag = "<p>"
         value = "sample text"
@@ -61,6 +104,11 @@ class TestHTMLNode(unittest.TestCase):
         self.assertEqual(result,
                          "HTMLNode(<p>, sample text, [HTMLNode(<p>, None, None, None)], {'id': 'foo', 'name': 'bar'})")
 
+    def test_iter_html(self):
+        node = HTMLNode("p", "sample text")
+
+        self.assertRaises(NotImplementedError, node.iter_html)
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -1,5 +1,6 @@
+import io
 import unittest
-from leafnode import LeafNode
+from leafnode import LeafNode, make_leaf
 
 class TestLeafNode(unittest.TestCase):
     def test_ctor_none(self):
@@ -22,6 +23,18 @@ class TestLeafNode(unittest.TestCase):
         self.assertEqual(node.children, None)
         self.assertEqual(node.props, props)
 
+    def test_make_leaf(self):
+        for args in ((None, "text"), ("b", "bold"), ("a", "link", { "href": "/a?b&c" })):
+            node = make_leaf(*args)
+            expected = LeafNode(*args)
+
+            self.assertIsInstance(node, LeafNode)
+            self.assertEqual(node.tag, expected.tag)
+            self.assertEqual(node.value, expected.value)
+            self.assertEqual(node.children, None)
+            self.assertEqual(node.props, expected.props)
+            self.assertEqual(node.to_html(), expected.to_html())
+
     def test_to_html_empty(self):
         node = LeafNode(None, None)
 
@@ -60,6 +73,21 @@ class TestLeafNode(unittest.TestCase):
         self.assertEqual(result,
                          "LeafNode(p, sample text, {'id': 'auto'})")
 
+    def test_iter_html(self):
+        node = LeafNode("a", "Click me!", { "href": "https://www.google.com"} )
+
+        result = list(node.iter_html())
+
+        self.assertListEqual(result, [ "<a href=\"https://www.google.com\">Click me!</a>" ])
+
+    def test_write_html(self):
+        node = LeafNode("p", "This is a paragraph of text.")
+        out = io.StringIO()
+
+        node.write_html(out)
+
+        self.assertEqual(out.getvalue(), "<p>This is a paragraph of text.</p>")
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from build import build_site
+from linkcheck import check_site, resolve_target
+from test_build import TEMPLATE, write_file
+
+class TestResolveTarget(unittest.TestCase):
+    def test_resolve_absolute(self):
+        self.assertEqual(resolve_target("blog/post.html", "/about.html"), "about.html")
+        self.assertEqual(resolve_target("blog/post.html", "/"), "index.html")
+        self.assertEqual(resolve_target("blog/post.html", "/docs/?page=2"), "docs/index.html")
+
+    def test_resolve_relative(self):
+        self.assertEqual(resolve_target("blog/post.html", "image.png"), "blog/image.png")
+        self.assertEqual(resolve_target("blog/post.html", "../index.html#top"), "index.html")
+        self.assertEqual(resolve_target("blog/post.html", "a%20b.html"), "blog/a b.html")
+
+    def test_resolve_fragment(self):
+        self.assertEqual(resolve_target("blog/post.html", "#section"), "blog/post.html")
+
+    def test_resolve_external(self):
+        self.assertIsNone(resolve_target("index.html", "https://example.com/x"))
+        self.assertIsNone(resolve_target("index.html", "mailto:someone@example.com"))
+        self.assertIsNone(resolve_target("index.html", "//cdn.example.com/x.js"))
+
+class TestCheckSite(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, "manifest.json")
+
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.dest, "images", "logo.png"), "png")
+        write_file(os.path.join(self.content, "index.md"),
+                   "# Home\n\n[post](/blog/post.html) [blog](/blog/) ![logo](/images/logo.png)\n\n"
+                   "[external](https://example.com) [top](#top)")
+        write_file(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n[home](../index.html)")
+        write_file(os.path.join(self.content, "blog", "post.md"),
+                   "# Post\n\n* [missing](missing.html)\n* ![gone](/images/gone.png)")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_build_records_references(self):
+        build_site(self.content, self.template, self.dest, self.manifest, "test")
+
+        result = check_site(self.dest, self.manifest)
+
+        self.assertEqual(result.pages, 3)
+        self.assertEqual(result.external, 1)
+        self.assertEqual(result.checked, 7)
+        self.assertListEqual(result.broken, [
+            ("blog/post.md", "link", "missing.html"),
+            ("blog/post.md", "image", "/images/gone.png"),
+        ])
+
+    def test_page_removed(self):
+        build_site(self.content, self.template, self.dest, self.manifest, "test")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        build_site(self.content, self.template, self.dest, self.manifest, "test")
+
+        result = check_site(self.dest, self.manifest)
+
+        self.assertListEqual(result.broken, [ ("index.md", "link", "/blog/post.html") ])
+
+    def test_no_manifest(self):
+        with self.assertRaises(Exception):
+            check_site(self.dest, self.manifest)
+
+if __name__ == "__main__":
+    unittest.main()
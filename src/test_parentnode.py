@@ -1,3 +1,4 @@
+import io
 import unittest
 from leafnode import LeafNode
 from parentnode import ParentNode
@@ -94,6 +95,74 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(result,
                          "ParentNode(p, [LeafNode(None, None, None)], {'id': 'auto'})")
 
+    def test_iter_html(self):
+        children = [
+                LeafNode("b", "Bold text"),
+                ParentNode("i", [ LeafNode(None, "italic text") ])
+            ]
+
+        node = ParentNode("p", children, { "id": "foo" })
+
+        result = list(node.iter_html())
+
+        self.assertListEqual(result,
+            [
+                "<p id=\"foo\">",
+                "<b>Bold text</b>",
+                "<i>",
+                "italic text",
+                "</i>",
+                "</p>"
+            ])
+
+    def test_iter_html_children_empty(self):
+        node = ParentNode("p", [ ParentNode("b", None) ])
+
+        self.assertRaises(ValueError, list, node.iter_html())
+
+    def test_write_html(self):
+        children = [
+                LeafNode("b", "Bold text"),
+                LeafNode(None, "Normal text")
+            ]
+
+        node = ParentNode("p", [ ParentNode("div", children) ])
+        out = io.StringIO()
+
+        node.write_html(out)
+
+        self.assertEqual(out.getvalue(), "<p><div><b>Bold text</b>Normal text</div></p>")
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_to_html_deep(self):
+        depth = 100000
+        node = LeafNode(None, "text")
+
+        for _ in range(depth):
+            node = ParentNode("blockquote", [ node ])
+
+        expected = "<blockquote>" * depth + "text" + "</blockquote>" * depth
+
+        self.assertEqual(node.to_html(), expected)
+        self.assertEqual("".join(node.iter_html()), expected)
+
+        out = io.StringIO()
+        node.write_html(out)
+
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_render(self):
+        node = ParentNode("ul", [
+                ParentNode("li", [ LeafNode("b", "first") ]),
+                ParentNode("li", [ LeafNode(None, "second") ])
+            ])
+        fragments = []
+
+        node.render(fragments.append)
+
+        self.assertListEqual(fragments,
+            [ "<ul>", "<li>", "<b>first</b>", "</li>", "<li>", "second", "</li>", "</ul>" ])
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,131 @@
+import unittest
+from convert import markdown_to_html, markdown_to_html_node, BlockCache
+from leafnode import LeafNode
+from parentnode import ParentNode
+import profiling
+from profiling import Profile, profile, count_html_nodes, count_nodes
+
+TEXT = """# heading
+
+some **bold** text
+
+* one
+* two
+
+some **bold** text"""
+
+class TestProfiling(unittest.TestCase):
+    def test_profile_inactive(self):
+        self.assertIsNone(profiling.active)
+
+        with profile() as stats:
+            self.assertIs(profiling.active, stats)
+
+        self.assertIsNone(profiling.active)
+
+    def test_profile_nested(self):
+        with profile() as outer:
+            with profile() as inner:
+                self.assertIs(profiling.active, inner)
+
+            self.assertIs(profiling.active, outer)
+
+    def test_profile_markdown_to_html_node(self):
+        expected = markdown_to_html_node(TEXT).to_html()
+
+        with profile() as stats:
+            result = markdown_to_html_node(TEXT).to_html()
+
+        self.assertEqual(result, expected)
+
+        self.assertEqual(stats.stages["markdown_to_blocks"].calls, 4)
+        self.assertEqual(stats.stages["block_to_block_type"].calls, 4)
+        self.assertEqual(stats.stages["block:heading"].calls, 1)
+        self.assertEqual(stats.stages["block:paragraph"].calls, 2)
+        self.assertEqual(stats.stages["block:unordered_list"].calls, 1)
+        self.assertEqual(stats.stages["markdown_to_html_node"].calls, 1)
+
+        # ul, 2 li and their 2 leaves
+        self.assertEqual(stats.stages["block:unordered_list"].nodes, 5)
+        self.assertEqual(stats.stages["block:unordered_list"].bytes,
+                         len("<ul><li>one</li><li>two</li></ul>"))
+
+        # one call per heading, paragraph and list item
+        self.assertEqual(stats.stages["text_to_textnodes"].calls, 5)
+        self.assertEqual(stats.stages["text_to_textnodes"].nodes, 9)
+
+    def test_profile_cache(self):
+        with profile() as stats:
+            markdown_to_html_node(TEXT, BlockCache())
+
+        self.assertEqual(stats.stages["block:paragraph"].calls, 1)
+        self.assertEqual(stats.stages["cached:paragraph"].calls, 1)
+
+    def test_profile_markdown_to_html(self):
+        text = TEXT + "\n\nsee [docs](/docs/)"
+        expected_references = []
+        expected = markdown_to_html(text, None, expected_references)
+        references = []
+
+        with profile() as stats:
+            result = markdown_to_html(text, BlockCache(), references)
+
+        self.assertEqual(result, expected)
+        self.assertListEqual(references, expected_references)
+
+        self.assertEqual(stats.stages["markdown_to_blocks"].calls, 5)
+        self.assertEqual(stats.stages["block:paragraph"].calls, 2)
+        self.assertEqual(stats.stages["cached:paragraph"].calls, 1)
+        self.assertEqual(stats.stages["block:unordered_list"].bytes,
+                         len("<ul><li>one</li><li>two</li></ul>"))
+        self.assertEqual(stats.stages["markdown_to_html"].bytes, len(result))
+
+        # the nodes markdown_to_html_node would build
+        self.assertEqual(stats.stages["block:unordered_list"].nodes, 5)
+        self.assertEqual(stats.stages["cached:paragraph"].nodes, 4)
+        self.assertEqual(stats.stages["markdown_to_html"].nodes, count_nodes(markdown_to_html_node(text)))
+
+        # one call per heading, uncached paragraph and list item
+        self.assertEqual(stats.stages["inline_to_html"].calls, 5)
+        self.assertEqual(stats.stages["inline_to_html"].nodes, 1 + 3 + 1 + 1 + 2)
+
+    def test_merge(self):
+        first = Profile()
+        first.record("to_html", 1.0, 2, 3)
+
+        second = Profile()
+        second.record("to_html", 0.5, 1, 1)
+        second.record("block:code", 0.25)
+
+        first.merge(second)
+
+        self.assertDictEqual(first.to_dict(),
+            {
+                "to_html": { "calls": 2, "seconds": 1.5, "nodes": 3, "bytes": 4 },
+                "block:code": { "calls": 1, "seconds": 0.25, "nodes": 0, "bytes": 0 }
+            })
+
+    def test_report(self):
+        stats = Profile()
+        stats.record("to_html", 0.002, 0, 100)
+
+        result = stats.report().split("\n")
+
+        self.assertEqual(len(result), 2)
+        self.assertTrue(result[1].startswith("to_html"))
+        self.assertEqual(result[1].split()[4], "-")
+
+    def test_count_nodes(self):
+        node = ParentNode("p", [ LeafNode(None, "a"), ParentNode("b", [ LeafNode(None, "b") ]) ])
+
+        self.assertEqual(count_nodes(node), 4)
+
+    def test_count_html_nodes(self):
+        for text in (TEXT, "```\ncode <b>\n```", "> a *b **c** d*", "1. [x](y) ![i](j)\n2. ", "# **a**"):
+            self.assertEqual(count_html_nodes(markdown_to_html(text)), count_nodes(markdown_to_html_node(text)))
+
+        self.assertEqual(count_html_nodes("a <b>b</b>"), 2)
+        self.assertEqual(count_html_nodes("<p>a <b>b <i>c</i></b></p>"), 5)
+
+if __name__ == "__main__":
+    unittest.main()
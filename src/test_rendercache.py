@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from build import build_site
+from rendercache import RenderCache
+from test_build import TEMPLATE, read_file, write_file
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.directory = os.path.join(self.root, "cache")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key(self):
+        cache = RenderCache(self.directory, "v1")
+
+        self.assertEqual(cache.key(b"# Title"), cache.key(b"# Title"))
+        self.assertNotEqual(cache.key(b"# Title"), cache.key(b"# Other"))
+        self.assertNotEqual(cache.key(b"# Title"), RenderCache(self.directory, "v2").key(b"# Title"))
+
+    def test_get_put(self):
+        cache = RenderCache(self.directory, "v1")
+        key = cache.key(b"# Title")
+
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, "<div><h1>Title</h1></div>")
+
+        self.assertEqual(cache.get(key), "<div><h1>Title</h1></div>")
+        self.assertEqual(RenderCache(self.directory, "v1").get(key), "<div><h1>Title</h1></div>")
+        self.assertListEqual(os.listdir(os.path.dirname(cache.path(key))), [ key ])
+
+    def test_get_corrupt(self):
+        cache = RenderCache(self.directory, "v1")
+        key = cache.key(b"# Title")
+
+        cache.put(key, "<div><h1>Title</h1></div>")
+        write_file(cache.path(key), "\"<div><h1>Ti")
+
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(cache.path(key)))
+
+    def test_get_utime_denied(self):
+        cache = RenderCache(self.directory, "v1")
+        key = cache.key(b"# Title")
+
+        cache.put(key, "<div><h1>Title</h1></div>")
+
+        with mock.patch("rendercache.os.utime", side_effect=PermissionError):
+            self.assertEqual(cache.get(key), "<div><h1>Title</h1></div>")
+
+    def test_evict(self):
+        cache = RenderCache(self.directory, "v1", 250)
+        keys = []
+
+        for i in range(4):
+            key = cache.key(str(i).encode("utf-8"))
+            cache.put(key, "x" * 100)
+            os.utime(cache.path(key), ns=(i * 1000000000, i * 1000000000))
+            keys.append(key)
+
+        # recently read entries are kept
+        cache.get(keys[0])
+
+        self.assertEqual(cache.evict(), 2)
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNone(cache.get(keys[2]))
+        self.assertIsNotNone(cache.get(keys[3]))
+
+    def test_evict_missing_directory(self):
+        self.assertEqual(RenderCache(self.directory, "v1").evict(), 0)
+
+class TestBuildRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.cache = os.path.join(self.root, "cache")
+
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nsome **text**")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\n* foo\n* bar")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def build(self, name, converter = "test"):
+        # a clean checkout each time, only the cache directory is shared
+        dest = os.path.join(self.root, name, "public")
+        manifest = os.path.join(self.root, name, "manifest.json")
+
+        build_site(self.content, self.template, dest, manifest, converter, render_cache_dir=self.cache)
+
+        return read_file(os.path.join(dest, "index.html"))
+
+    def test_build_shared(self):
+        expected = self.build("first")
+        cache = RenderCache(self.cache, "test")
+
+        # served from the cache, not converted again
+        cache.put(cache.key(b"# Home\n\nsome **text**"), { "html": "<div>cached</div>", "links": [], "images": [] })
+
+        self.assertEqual(self.build("second"), "<title>Home</title><main><div>cached</div></main>")
+        self.assertEqual(expected,
+            "<title>Home</title><main><div><h1>Home</h1><p>some <b>text</b></p></div></main>")
+
+    def test_build_corrupt_entry(self):
+        expected = self.build("first")
+        cache = RenderCache(self.cache, "test")
+        path = cache.path(cache.key(b"# Home\n\nsome **text**"))
+
+        write_file(path, "{ \"html\": ")
+
+        self.assertEqual(self.build("second"), expected)
+        self.assertEqual(cache.get(cache.key(b"# Home\n\nsome **text**"))["html"],
+            "<div><h1>Home</h1><p>some <b>text</b></p></div>")
+
+    def test_build_converter_changed(self):
+        self.build("first")
+        cache = RenderCache(self.cache, "test")
+        cache.put(cache.key(b"# Home\n\nsome **text**"), { "html": "<div>cached</div>", "links": [], "images": [] })
+
+        self.assertIn("<b>text</b>", self.build("second", "other"))
+        self.assertEqual(len(RenderCache(self.cache, "test").entries()), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import urllib.request
+from serve import RELOAD_PATH, RELOAD_SCRIPT, SiteWatcher, inject_reload_script, make_server
+from test_build import TEMPLATE, read_file, write_file
+
+def bump_mtime(path):
+    # writes within one mtime tick must still be seen as changes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+class TestInjectReloadScript(unittest.TestCase):
+    def test_inject_before_body(self):
+        result = inject_reload_script(b"<body><p>hi</p></body></html>")
+
+        self.assertEqual(result, b"<body><p>hi</p>" + RELOAD_SCRIPT.encode("utf-8") + b"</body></html>")
+
+    def test_inject_without_body(self):
+        result = inject_reload_script(b"<p>hi</p>")
+
+        self.assertEqual(result, b"<p>hi</p>" + RELOAD_SCRIPT.encode("utf-8"))
+
+class TestSiteWatcher(unittest.TestCase):
+    # inotify where available
+    NOTIFY = True
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = self.temp_dir.name
+
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, "manifest.json")
+
+        write_file(self.template, TEMPLATE)
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nsome **text**")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post\n\n* foo\n* bar")
+        write_file(os.path.join(self.dest, "styles.css"), "body { margin: 0; }")
+
+        self.watcher = SiteWatcher(self.content, self.template, self.dest, self.manifest, notify=self.NOTIFY)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.close()
+        self.temp_dir.cleanup()
+
+    def test_poll_unchanged(self):
+        self.assertListEqual(self.watcher.poll(), [])
+        self.assertEqual(self.watcher.generation, 0)
+
+    def test_poll_page_changed(self):
+        path = os.path.join(self.content, "index.md")
+        write_file(path, "# Home\n\nchanged")
+        bump_mtime(path)
+
+        result = self.watcher.poll()
+
+        self.assertListEqual(result, [ "index.md" ])
+        self.assertEqual(self.watcher.generation, 1)
+        self.assertIn("<p>changed</p>", read_file(os.path.join(self.dest, "index.html")))
+
+    def test_poll_page_touched(self):
+        bump_mtime(os.path.join(self.content, "index.md"))
+
+        self.assertListEqual(self.watcher.poll(), [])
+
+    def test_poll_page_added(self):
+        write_file(os.path.join(self.content, "new.md"), "# New")
+
+        result = self.watcher.poll()
+
+        self.assertListEqual(result, [ "new.md" ])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "new.html")))
+
+    def test_poll_page_removed(self):
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+
+        result = self.watcher.poll()
+
+        self.assertListEqual(result, [ "blog/post.md" ])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+    def test_poll_invalid_page(self):
+        path = os.path.join(self.content, "index.md")
+        write_file(path, "**unclosed")
+        bump_mtime(path)
+
+        with mock.patch("sys.stderr"):
+            result = self.watcher.poll()
+
+        self.assertListEqual(result, [])
+        self.assertIn("<b>text</b>", read_file(os.path.join(self.dest, "index.html")))
+
+    def test_poll_template_changed(self):
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        bump_mtime(self.template)
+
+        result = self.watcher.poll()
+
+        self.assertListEqual(result, [ "blog/post.md", "index.md" ])
+        self.assertTrue(read_file(os.path.join(self.dest, "index.html")).startswith("<h1>Home</h1>"))
+
+    def test_poll_template_override(self):
+        path = os.path.join(self.content, "blog", "template.html")
+        write_file(path, "<article>{{ Content }}</article>")
+
+        self.assertListEqual(self.watcher.poll(), [ "blog/post.md" ])
+
+        write_file(path, "<section>{{ Content }}</section>")
+        bump_mtime(path)
+
+        self.assertListEqual(self.watcher.poll(), [ "blog/post.md" ])
+        self.assertTrue(read_file(os.path.join(self.dest, "blog", "post.html")).startswith("<section>"))
+
+        # pages edited later use the override too
+        write_file(os.path.join(self.content, "blog", "new.md"), "# New")
+
+        self.assertListEqual(self.watcher.poll(), [ "blog/new.md" ])
+        self.assertTrue(read_file(os.path.join(self.dest, "blog", "new.html")).startswith("<section>"))
+
+    def test_save(self):
+        write_file(os.path.join(self.content, "new.md"), "# New")
+        self.watcher.poll()
+        self.watcher.save()
+
+        watcher = SiteWatcher(self.content, self.template, self.dest, self.manifest)
+        watcher.load()
+        watcher.close()
+
+        self.assertIn("new.md", watcher.pages)
+
+    def test_server(self):
+        server = make_server(self.watcher, "127.0.0.1", 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        try:
+            with urllib.request.urlopen(url + "/") as response:
+                html = response.read().decode("utf-8")
+
+            self.assertTrue(html.startswith("<title>Home</title>"))
+            self.assertIn(RELOAD_SCRIPT, html)
+
+            with urllib.request.urlopen(url + "/styles.css") as response:
+                self.assertEqual(response.read(), b"body { margin: 0; }")
+
+            with urllib.request.urlopen(url + RELOAD_PATH, timeout=5) as response:
+                self.assertEqual(response.headers["Content-Type"], "text/event-stream")
+
+                path = os.path.join(self.content, "index.md")
+                write_file(path, "# Home\n\nchanged")
+                bump_mtime(path)
+                self.watcher.poll()
+
+                self.assertEqual(response.readline(), b"data: reload\n")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+class TestSiteWatcherPolling(TestSiteWatcher):
+    NOTIFY = False
+
+if __name__ == "__main__":
+    unittest.main()
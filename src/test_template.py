@@ -0,0 +1,49 @@
+import io
+import hashlib
+import unittest
+from template import Template
+
+class TestTemplate(unittest.TestCase):
+    def test_parse(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+
+        self.assertListEqual(template.segments, [ "<title>", "</title><main>", "</main>" ])
+        self.assertListEqual(template.slots, [ "Title", "Content" ])
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<footer>{{ Title }}</footer>")
+
+        result = template.render({ "Title": "Home", "Content": "<p>text</p>" })
+
+        self.assertEqual(result, "<h1>Home</h1><p>text</p><footer>Home</footer>")
+
+    def test_render_unknown_placeholder(self):
+        template = Template("{{ Author }} {{Title}} {{ Content }}")
+
+        self.assertEqual(template.render({ "Title": "Home", "Content": "text" }), "{{ Author }} {{Title}} text")
+
+    def test_render_values_not_parsed(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+
+        result = template.render({ "Title": "{{ Content }}", "Content": "text" })
+
+        self.assertEqual(result, "<title>{{ Content }}</title>text")
+
+    def test_render_no_slots(self):
+        self.assertEqual(Template("static").render({}), "static")
+
+    def test_write(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        values = { "Title": "Café", "Content": "<p>text</p>" }
+        out = io.BytesIO()
+        digest = hashlib.sha256()
+
+        template.write(out, values, digest)
+
+        expected = template.render(values).encode("utf-8")
+
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(digest.hexdigest(), hashlib.sha256(expected).hexdigest())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from textnode import TextNode, TextType
+from textnode import NestedTextNode, TextNode, TextSpan, TextType
 
 class TestTextNode(unittest.TestCase):
     def test_ctor_no_url(self):
@@ -50,6 +50,12 @@ class TestTextNode(unittest.TestCase):
         self.assertNotEqual(node1, node3)
         self.assertNotEqual(node2, node3)
 
+    def test_eq_children_diff(self):
+        node1 = TextNode("bold", TextType.ITALIC, None, [ TextNode("bold", TextType.BOLD) ])
+        node2 = TextNode("bold", TextType.ITALIC)
+
+        self.assertNotEqual(node1, node2)
+
     def test_repr(self):
         text = "sample text"
         text_type = TextType.ITALIC
@@ -62,5 +68,39 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(result,
                          "TextNode(sample text, italic, http://example.com)")
 
+    def test_repr_children(self):
+        node = TextNode("bold", TextType.ITALIC, None, [ TextNode("bold", TextType.BOLD) ])
+
+        result = node.__repr__()
+
+        self.assertEqual(result,
+                         "TextNode(bold, italic, None, [TextNode(bold, bold, None)])")
+
+    def test_span(self):
+        source = "some **bold** text"
+
+        node = TextSpan(source, 7, 11, TextType.BOLD)
+
+        self.assertIs(node.source, source)
+        self.assertEqual(node.text, "bold")
+        self.assertEqual(node, TextNode("bold", TextType.BOLD))
+        self.assertEqual(node.__repr__(), "TextNode(bold, bold, None)")
+
+    def test_span_slots(self):
+        # the span slots are not on plain nodes
+        self.assertFalse(hasattr(TextNode("text", TextType.NORMAL), "source"))
+        self.assertEqual(TextNode.__slots__, ("text", "text_type", "url", "children"))
+
+    def test_nested_text(self):
+        children = [
+            TextSpan("italic *", 0, 7, TextType.NORMAL),
+            TextNode("bold", TextType.BOLD)
+        ]
+
+        node = NestedTextNode(TextType.ITALIC, children)
+
+        self.assertEqual(node.text, "italic bold")
+        self.assertEqual(node, TextNode("italic bold", TextType.ITALIC, None, children))
+
 if __name__ == "__main__":
     unittest.main()
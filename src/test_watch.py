@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import unittest
+from test_build import write_file
+from test_serve import bump_mtime
+from watch import ContentScanner, Inotify
+
+def inotify_available():
+    try:
+        Inotify().close()
+    except OSError:
+        return False
+
+    return True
+
+def age_directories(root):
+    # listings older than the racy window, so polling only stats the files
+    for path, dirs, files in os.walk(root):
+        os.utime(path, ns=(0, 1000000000))
+
+class TestContentScanner(unittest.TestCase):
+    NOTIFY = False
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.content = self.temp_dir.name
+
+        write_file(os.path.join(self.content, "index.md"), "# Home")
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+        write_file(os.path.join(self.content, "blog", "notes.txt"), "not a page")
+
+        age_directories(self.content)
+
+        self.scanner = ContentScanner(self.content, self.NOTIFY)
+
+    def tearDown(self):
+        self.scanner.close()
+        self.temp_dir.cleanup()
+
+    def test_scan(self):
+        self.assertListEqual(sorted(self.scanner.pages), [ "blog/post.md", "index.md" ])
+        self.assertDictEqual(self.scanner.templates, {})
+        self.assertEqual(self.scanner.update(), ([], False))
+
+    def test_edited_in_place(self):
+        path = os.path.join(self.content, "blog", "post.md")
+        write_file(path, "# Post\n\nchanged")
+        bump_mtime(path)
+        age_directories(self.content)
+
+        self.assertEqual(self.scanner.update(), ([ "blog/post.md" ], False))
+        self.assertEqual(self.scanner.update(), ([], False))
+
+    def test_added_and_removed(self):
+        write_file(os.path.join(self.content, "blog", "new.md"), "# New")
+        os.remove(os.path.join(self.content, "index.md"))
+
+        self.assertEqual(self.scanner.update(), ([ "blog/new.md", "index.md" ], False))
+        self.assertListEqual(sorted(self.scanner.pages), [ "blog/new.md", "blog/post.md" ])
+
+    def test_directory_added(self):
+        write_file(os.path.join(self.content, "docs", "deep", "page.md"), "# Page")
+
+        self.assertEqual(self.scanner.update(), ([ "docs/deep/page.md" ], False))
+
+        # the new directory is tracked from now on
+        write_file(os.path.join(self.content, "docs", "deep", "other.md"), "# Other")
+
+        self.assertEqual(self.scanner.update(), ([ "docs/deep/other.md" ], False))
+
+    def test_directory_removed(self):
+        shutil.rmtree(os.path.join(self.content, "blog"))
+
+        self.assertEqual(self.scanner.update(), ([ "blog/post.md" ], False))
+        self.assertNotIn("blog/", self.scanner.directories)
+
+    def test_directory_recreated(self):
+        shutil.rmtree(os.path.join(self.content, "blog"))
+        self.scanner.update()
+
+        write_file(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+        self.assertEqual(self.scanner.update(), ([ "blog/post.md" ], False))
+
+        write_file(os.path.join(self.content, "blog", "new.md"), "# New")
+
+        self.assertEqual(self.scanner.update(), ([ "blog/new.md" ], False))
+
+    def test_templates(self):
+        path = os.path.join(self.content, "blog", "template.html")
+        write_file(path, "{{ Content }}")
+
+        self.assertEqual(self.scanner.update(), ([], True))
+        self.assertListEqual(list(self.scanner.templates), [ path ])
+
+        write_file(path, "<main>{{ Content }}</main>")
+        bump_mtime(path)
+        age_directories(self.content)
+
+        self.assertEqual(self.scanner.update(), ([], True))
+
+        os.remove(path)
+
+        self.assertEqual(self.scanner.update(), ([], True))
+        self.assertDictEqual(self.scanner.templates, {})
+
+@unittest.skipUnless(inotify_available(), "inotify is not available")
+class TestContentScannerInotify(TestContentScanner):
+    NOTIFY = True
+
+    def test_notifier(self):
+        self.assertIsNotNone(self.scanner.notifier)
+        self.assertSetEqual(set(self.scanner.notifier.prefixes), { "", "blog/" })
+
+if __name__ == "__main__":
+    unittest.main()
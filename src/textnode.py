@@ -9,10 +9,14 @@ class TextType(Enum):
     IMAGE = 'image'
 
 class TextNode():
-    def __init__(self, text, text_type, url = None):
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url = None, children = None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        # nested spans, e.g. bold inside italic
+        self.children = children
 
     def __eq__(self, other):
         if self.text != other.text:
@@ -24,7 +28,45 @@ class TextNode():
         if self.url != other.url:
             return False
 
+        if self.children != other.children:
+            return False
+
         return True
 
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text}, {self.text_type.value}, {self.url}, {self.children})"
+
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
+
+class TextSpan(TextNode):
+    # a node whose text is source[start:end], sliced only when it is read;
+    # the extra slots are on spans only, a plain TextNode keeps its plain
+    # text attribute
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source, start, end, text_type, url = None):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.text_type = text_type
+        self.url = url
+        self.children = None
+
+    @property
+    def text(self):
+        return self.source[self.start:self.end]
+
+class NestedTextNode(TextNode):
+    # a span holding other spans; its text, the text of its children, is
+    # joined only when it is read, rendering uses the children
+    __slots__ = ()
+
+    def __init__(self, text_type, children):
+        self.text_type = text_type
+        self.url = None
+        self.children = children
+
+    @property
+    def text(self):
+        return "".join(child.text for child in self.children)
@@ -0,0 +1,278 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+import time
+from build import TEMPLATE_NAME
+
+# inotify(7) event bits
+IN_MODIFY = 0x2
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+
+# everything that can change a listing or a file in a watched directory
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+
+# struct inotify_event without the name that follows it
+EVENT = struct.Struct("iIII")
+
+# a listing taken this soon after its directory changed may have missed
+# a change within the same timestamp tick
+RACY_NS = 1000000000
+
+class Inotify():
+    # events of watched directories through inotify(7), Linux only; any
+    # setup failure raises OSError
+    def __init__(self):
+        name = ctypes.util.find_library("c")
+
+        try:
+            self.libc = ctypes.CDLL(name, use_errno=True)
+            init = self.libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError("inotify is not available")
+
+        self.fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # watch descriptor to the directory prefix it watches, and back
+        self.watches = {}
+        self.prefixes = {}
+
+    def add_watch(self, path, prefix):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+
+        self.watches[wd] = prefix
+        self.prefixes[prefix] = wd
+
+    def watching(self, prefix):
+        return prefix in self.prefixes
+
+    def read(self):
+        # prefixes of the directories with events since the last read, None
+        # when the kernel dropped events
+        changed = set()
+
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return changed
+
+            offset = 0
+
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size + length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed = None
+
+                prefix = self.watches.get(wd)
+
+                # the directory is gone, or was watched again under a new wd
+                if mask & IN_IGNORED and prefix is not None:
+                    del self.watches[wd]
+
+                    if self.prefixes.get(prefix) == wd:
+                        del self.prefixes[prefix]
+
+                if prefix is not None and changed is not None:
+                    changed.add(prefix)
+
+    def close(self):
+        os.close(self.fd)
+
+class ContentScanner():
+    # stats of the pages and template overrides under content_dir, kept
+    # per directory; with inotify only directories that reported events
+    # are read again, otherwise each update stats every directory, lists
+    # the ones that changed and stats the files of the others, so a page
+    # edited in place is still seen
+    def __init__(self, content_dir, notify = True):
+        self.content_dir = content_dir
+
+        # page and template path to [ mtime_ns, size ], as build.stat_key
+        self.pages = {}
+        self.templates = {}
+
+        # prefix, "" or "a/b/", to [ mtime_ns, listed_ns, pages, template
+        # path or None, subdirectory prefixes ]
+        self.directories = {}
+
+        self.notifier = None
+
+        if notify:
+            try:
+                self.notifier = Inotify()
+            except OSError:
+                pass
+
+        self.scan_directory("", set(), set())
+
+    def update(self):
+        # (sorted pages added, changed or removed, whether any template
+        # override was) since the last update
+        changed = set()
+        templates = set()
+
+        if self.notifier is not None:
+            prefixes = self.notifier.read()
+
+            if prefixes is None:
+                prefixes = list(self.directories)
+
+            # parents first, a rescan of a parent can drop its children
+            for prefix in sorted(prefixes):
+                if prefix in self.directories:
+                    self.scan_directory(prefix, changed, templates)
+        else:
+            for prefix in list(self.directories):
+                if prefix in self.directories:
+                    self.check_directory(prefix, changed, templates)
+
+        return sorted(changed), len(templates) > 0
+
+    def check_directory(self, prefix, changed, templates):
+        state = self.directories[prefix]
+
+        try:
+            mtime = os.stat(os.path.join(self.content_dir, prefix)).st_mtime_ns
+        except FileNotFoundError:
+            self.remove_directory(prefix, changed, templates)
+            return
+
+        if mtime != state[0] or state[1] - mtime < RACY_NS:
+            self.scan_directory(prefix, changed, templates)
+            return
+
+        # same listing, only the files themselves can have changed
+        for page in state[2]:
+            self.restat(self.pages, page, os.path.join(self.content_dir, page), changed)
+
+        if state[3] is not None:
+            self.restat(self.templates, state[3], state[3], templates)
+
+    def restat(self, stats, key, path, changed):
+        try:
+            stat = os.stat(path)
+            value = [ stat.st_mtime_ns, stat.st_size ]
+        except FileNotFoundError:
+            value = None
+
+        if stats.get(key) != value:
+            if value is None:
+                del stats[key]
+            else:
+                stats[key] = value
+
+            changed.add(key)
+
+    def scan_directory(self, prefix, changed, templates):
+        # lists one directory, stats its files and follows new and removed
+        # subdirectories
+        path = os.path.join(self.content_dir, prefix)
+
+        try:
+            listed = time.time_ns()
+            mtime = os.stat(path).st_mtime_ns
+
+            # watched before listing, so nothing between the two is missed
+            if self.notifier is not None and not self.notifier.watching(prefix):
+                try:
+                    self.notifier.add_watch(path, prefix)
+                except OSError:
+                    # e.g. out of watches, fall back to polling
+                    self.notifier.close()
+                    self.notifier = None
+
+            pages = {}
+            template = None
+            subdirectories = []
+
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        subdirectories.append(prefix + entry.name + "/")
+                    elif entry.name.endswith(".md"):
+                        stat = entry.stat()
+                        pages[prefix + entry.name] = [ stat.st_mtime_ns, stat.st_size ]
+                    elif entry.name == TEMPLATE_NAME:
+                        stat = entry.stat()
+                        template = entry.path
+                        template_stat = [ stat.st_mtime_ns, stat.st_size ]
+        except FileNotFoundError:
+            self.remove_directory(prefix, changed, templates)
+            return
+
+        old = self.directories.get(prefix)
+
+        if old is not None:
+            for page in old[2]:
+                if page not in pages:
+                    del self.pages[page]
+                    changed.add(page)
+
+            if old[3] is not None and old[3] != template:
+                del self.templates[old[3]]
+                templates.add(old[3])
+
+            for subdirectory in old[4]:
+                if subdirectory not in subdirectories:
+                    self.remove_directory(subdirectory, changed, templates)
+
+        for page, stat in pages.items():
+            if self.pages.get(page) != stat:
+                self.pages[page] = stat
+                changed.add(page)
+
+        if template is not None and self.templates.get(template) != template_stat:
+            self.templates[template] = template_stat
+            templates.add(template)
+
+        self.directories[prefix] = [ mtime, listed, list(pages), template, subdirectories ]
+
+        for subdirectory in subdirectories:
+            if old is None or subdirectory not in old[4]:
+                self.scan_directory(subdirectory, changed, templates)
+
+    def remove_directory(self, prefix, changed, templates):
+        state = self.directories.pop(prefix, None)
+
+        if state is None:
+            return
+
+        for page in state[2]:
+            self.pages.pop(page, None)
+            changed.add(page)
+
+        if state[3] is not None:
+            self.templates.pop(state[3], None)
+            templates.add(state[3])
+
+        for subdirectory in state[4]:
+            self.remove_directory(subdirectory, changed, templates)
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+
+    def __repr__(self):
+        mode = "polling" if self.notifier is None else "inotify"
+
+        return f"ContentScanner({len(self.pages)} pages, {len(self.directories)} directories, {mode})"